@@ -0,0 +1,221 @@
+"""
+batch_cli.py
+------------
+Shared batch mode for translate.py and summarize.py: process a whole corpus in one
+long-running job instead of one cold start (and one model load) per text.
+
+- Inputs: directories (all *.txt, recursively), globs, single text files, or JSONL files
+  with one verse per line ({"text": ..., "Book_id": .., "Chapter_id": .., "Verse_id": ..}).
+- The model is loaded once per worker process (pool initializer); with several workers each
+  is limited to --torch-threads intra-op threads (default: cores / workers) so N workers
+  don't oversubscribe the CPU. A single in-process worker keeps torch's default threading.
+- Outputs go next to the inputs (<name>.<suffix>.txt, <name>.<suffix>.jsonl) or, with
+  --sink, to a single JSONL file. Every run rewrites its outputs, so re-running a batch
+  never duplicates rows.
+- Progress and throughput are reported while the job runs.
+
+Used by:
+    python translate.py --batch verses/ --target-langs hi,ta --workers 4
+    python summarize.py --batch "parvas/*.txt" --workers 2 --sink summaries.jsonl
+"""
+
+from __future__ import annotations
+import glob
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+VERSE_ID_FIELDS = ("Book_id", "Chapter_id", "Verse_id")
+
+# Work functions return {suffix: text}, e.g. {"hi": "...", "ta": "..."} or {"summary": "..."}.
+InitFn = Callable[[dict], Any]
+WorkFn = Callable[[Any, str, dict], Dict[str, str]]
+
+
+# --------------------------
+# Input discovery
+# --------------------------
+def add_batch_args(p, default_suffix: str) -> None:
+    p.add_argument("--batch", nargs="+", metavar="INPUT",
+                   help="Batch mode: directories, globs, .txt files or .jsonl verse files to process.")
+    p.add_argument("--workers", type=int, default=1, help="Worker processes for --batch (1 = in-process).")
+    p.add_argument("--torch-threads", type=int, default=None,
+                   help="torch intra-op threads per batch worker (default: cores / workers; uncapped with 1 worker).")
+    p.add_argument("--sink", type=str, help="Write all batch results to this JSONL file (overwritten) instead of next to the inputs.")
+    p.add_argument("--suffix", type=str, default=default_suffix, help="Output name suffix for batch results.")
+
+
+def iter_items(inputs: Iterable[str], suffix: str = "out") -> Iterator[dict]:
+    """Expand inputs into work items: {"id", "path"} for text files, {"id", "text", "record", "src"} for JSONL lines."""
+    for inp in inputs:
+        if os.path.isdir(inp):
+            paths = sorted(glob.glob(os.path.join(inp, "**", "*.txt"), recursive=True))
+        elif os.path.isfile(inp):
+            paths = [inp]
+        else:
+            paths = sorted(glob.glob(inp, recursive=True))
+            if not paths:
+                print(f"[warn] No inputs match: {inp}", file=sys.stderr)
+        for path in paths:
+            if path.endswith(".jsonl"):
+                if not _is_output(path, suffix):
+                    yield from _iter_jsonl(path)
+            elif not _is_output(path, suffix):
+                yield {"id": path, "path": path}
+
+
+def _is_output(path: str, suffix: str) -> bool:
+    # Don't re-process results written by an earlier batch run over the same directory.
+    return f".{suffix}." in os.path.basename(path)
+
+
+def _iter_jsonl(path: str) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                print(f"[warn] {path}:{lineno}: invalid JSON, skipped", file=sys.stderr)
+                continue
+            if all(k in rec for k in VERSE_ID_FIELDS):
+                item_id = "/".join(str(rec[k]) for k in VERSE_ID_FIELDS)
+            else:
+                item_id = f"{path}:{lineno}"
+            yield {"id": item_id, "text": rec.get("text", ""), "record": rec, "src": path}
+
+
+# --------------------------
+# Workers
+# --------------------------
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(init_fn: InitFn, work_fn: WorkFn, opts: dict) -> None:
+    threads = opts.get("torch_threads") or 0
+    if threads > 0:
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        os.environ["MKL_NUM_THREADS"] = str(threads)
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except Exception:
+            pass
+    _WORKER["state"] = init_fn(opts)
+    _WORKER["work"] = work_fn
+    _WORKER["opts"] = opts
+
+
+def _run_item(item: dict) -> dict:
+    text = item.get("text")
+    try:
+        if text is None:
+            with open(item["path"], "r", encoding="utf-8") as f:
+                text = f.read()
+        outputs = _WORKER["work"](_WORKER["state"], text, _WORKER["opts"])
+        return {"item": item, "outputs": outputs, "chars": len(text), "error": None}
+    except Exception as e:
+        return {"item": item, "outputs": {}, "chars": len(text or ""), "error": str(e)}
+
+
+# --------------------------
+# Output
+# --------------------------
+class ResultWriter:
+    def __init__(self, sink: Optional[str], suffix: str):
+        self.suffix = suffix
+        self.sink: Optional[TextIO] = open(sink, "w", encoding="utf-8") if sink else None
+        self._per_source: Dict[str, TextIO] = {}
+
+    def write(self, res: dict) -> None:
+        item = res["item"]
+        row = {"id": item["id"], "outputs": res["outputs"]}
+        if res["error"]:
+            row["error"] = res["error"]
+        if self.sink is not None:
+            self._write_row(self.sink, item, row)
+        elif "path" in item:
+            if res["error"]:
+                return
+            stem, _ = os.path.splitext(item["path"])
+            for key, text in res["outputs"].items():
+                name = f"{stem}.{self.suffix}.txt" if key == self.suffix else f"{stem}.{self.suffix}.{key}.txt"
+                with open(name, "w", encoding="utf-8") as f:
+                    f.write(text + "\n")
+        else:
+            src = item["src"]
+            if src not in self._per_source:
+                # Opened (and truncated) once per run, like the .txt outputs are overwritten.
+                stem, _ = os.path.splitext(src)
+                self._per_source[src] = open(f"{stem}.{self.suffix}.jsonl", "w", encoding="utf-8")
+            self._write_row(self._per_source[src], item, row)
+
+    @staticmethod
+    def _write_row(f: TextIO, item: dict, row: dict) -> None:
+        rec = item.get("record")
+        if rec:
+            row = {**{k: rec[k] for k in VERSE_ID_FIELDS if k in rec}, **row}
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        f.flush()
+
+    def close(self) -> None:
+        for f in [self.sink, *self._per_source.values()]:
+            if f is not None:
+                f.close()
+
+
+# --------------------------
+# Driver
+# --------------------------
+def run_batch(inputs: List[str], init_fn: InitFn, work_fn: WorkFn, opts: dict,
+              workers: int = 1, sink: Optional[str] = None, suffix: str = "out",
+              report_every: float = 5.0) -> int:
+    """Run work_fn over every input item. Returns the number of failed items."""
+    items = list(iter_items(inputs, suffix))
+    total = len(items)
+    if not total:
+        print("[batch] Nothing to do.")
+        return 0
+
+    threads = opts.get("torch_threads")
+    if threads is None and workers > 1:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+    opts = {**opts, "torch_threads": threads}
+
+    writer = ResultWriter(sink, suffix)
+    done = failed = chars = 0
+    t0 = last = time.perf_counter()
+    print(f"[batch] {total} items, {max(1, workers)} worker(s), {threads or 'default'} torch thread(s) each", flush=True)
+
+    def results() -> Iterator[dict]:
+        if workers <= 1:
+            _init_worker(init_fn, work_fn, opts)
+            for item in items:
+                yield _run_item(item)
+            return
+        # spawn: forking a process that already holds torch/OpenMP state is unsafe.
+        ctx = mp.get_context("spawn")
+        with ctx.Pool(workers, initializer=_init_worker, initargs=(init_fn, work_fn, opts)) as pool:
+            yield from pool.imap_unordered(_run_item, items, chunksize=1)
+
+    try:
+        for res in results():
+            writer.write(res)
+            done += 1
+            chars += res["chars"]
+            if res["error"]:
+                failed += 1
+                print(f"[warn] {res['item']['id']}: {res['error']}", file=sys.stderr)
+            now = time.perf_counter()
+            if now - last >= report_every or done == total:
+                el = max(now - t0, 1e-9)
+                print(f"[batch] {done}/{total} done ({failed} failed)  {done / el:.2f} items/s  {chars / el:,.0f} chars/s",
+                      flush=True)
+                last = now
+    finally:
+        writer.close()
+    return failed
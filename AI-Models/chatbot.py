@@ -1,6 +1,9 @@
 from __future__ import annotations
-import sys, subprocess, re, argparse
-from typing import Dict, Tuple, Optional
+import sys, os, subprocess, re, argparse, json, tempfile, threading, heapq, unicodedata, hashlib, time
+from array import array
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Dict, Tuple, Optional, List, Iterable
 
 # ---------------------------
 # Best-effort auto-installer (only if missing)
@@ -177,13 +180,174 @@ FACT_OVERRIDES = [
      "The Mahabharata contains over 100,000 verses, making it one of the longest epic poems in the world. It is approximately 1.8 million words long."),
 ]
 
+# ---------------------------
+# Multilingual lexicon (query side, no model call)
+# ---------------------------
+# Native-script aliases for the core names/terms, per LANG_OPTIONS script. Aliases are stems so
+# inflected forms (e.g. Tamil/Telugu case endings, Russian declensions) still match as substrings.
+# Latin-script languages (fr/es/de) share the English spellings and only need accent folding.
+MULTILINGUAL_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "mahabharata": (
+        "महाभारत", "মহাভারত", "மகாபாரத", "మహాభారత", "ಮಹಾಭಾರತ", "મહાભારત", "ਮਹਾਭਾਰਤ",
+        "മഹാഭാരത", "مہابھارت", "ماهابهاراتا", "махабхарат", "マハーバーラタ", "摩诃婆罗多", "摩訶婆羅多",
+    ),
+    "krishna": (
+        "कृष्ण", "কৃষ্ণ", "கிருஷ்ண", "కృష్ణ", "ಕೃಷ್ಣ", "કૃષ્ણ", "ਕ੍ਰਿਸ਼ਨ", "കൃഷ്ണ",
+        "کرشن", "كريشنا", "кришн", "クリシュナ", "奎师那",
+    ),
+    "arjuna": (
+        "अर्जुन", "অর্জুন", "அர்ஜுன", "అర్జున", "ಅರ್ಜುನ", "અર્જુન", "ਅਰਜੁਨ", "അർജുന",
+        "ارجن", "أرجونا", "арджун", "アルジュナ", "阿周那",
+    ),
+    "pandavas": (
+        "पांडव", "पाण्डव", "পাণ্ডব", "பாண்டவ", "పాండవ", "ಪಾಂಡವ", "પાંડવ", "ਪਾਂਡਵ", "പാണ്ഡവ",
+        "پانڈو", "باندافا", "пандав", "パーンダヴァ", "般度族", "般度五子",
+    ),
+    "kauravas": (
+        "कौरव", "কৌরব", "கௌரவ", "కౌరవ", "ಕೌರವ", "કૌરવ", "ਕੌਰਵ", "കൗരവ",
+        "کورووں", "كورافا", "каурав", "カウラヴァ", "俱卢族",
+    ),
+    "karna": (
+        "कर्ण", "কর্ণ", "கர்ண", "కర్ణ", "ಕರ್ಣ", "કર્ણ", "ਕਰਣ", "കർണ",
+        "كارنا", "карна", "карну", "карне", "карной", "カルナ", "迦尔纳",
+    ),
+    "bhishma": (
+        "भीष्म", "ভীষ্ম", "பீஷ்ம", "భీష్మ", "ಭೀಷ್ಮ", "ભીષ્મ", "ਭੀਸ਼ਮ", "ഭീഷ്മ",
+        "بھیشم", "بهيشما", "бхишм", "ビーシュマ", "毗湿摩",
+    ),
+    "drona": (
+        "द्रोण", "দ্রোণ", "துரோண", "ద్రోణ", "ದ್ರೋಣ", "દ્રોણ", "ਦ੍ਰੋਣ", "ദ്രോണ",
+        "درون", "درونا", "дроначарь", "ドローナ", "德罗纳",
+    ),
+    "draupadi": (
+        "द्रौपदी", "দ্রৌপদী", "திரௌபதி", "ద్రౌపది", "ದ್ರೌಪದಿ", "દ્રૌપદી", "ਦਰੋਪਦੀ", "ദ്രൗപദി",
+        "دروپدی", "دروبادي", "драупад", "ドラウパディー", "德罗波蒂",
+    ),
+    "bhagavad gita": (
+        "गीता", "গীতা", "கீதை", "గీత", "ಗೀತೆ", "ગીતા", "ਗੀਤਾ", "ഗീത",
+        "گیتا", "غيتا", "бхагавадгит", "гита", "гиту", "гите", "гиты", "гитой", "ギーター", "薄伽梵歌",
+    ),
+    "kurukshetra": (
+        "कुरुक्षेत्र", "কুরুক্ষেত্র", "குருக்ஷேத்ர", "కురుక్షేత్ర", "ಕುರುಕ್ಷೇತ್ರ", "કુરુક્ષેત્ર", "ਕੁਰੂਕਸ਼ੇਤਰ",
+        "കുരുക്ഷേത്ര", "کروکشیتر", "كوروكشترا", "курукшетр", "クルクシェートラ", "俱卢之野",
+    ),
+    "dharma": (
+        "धर्म", "ধর্ম", "தர்ம", "ధర్మ", "ಧರ್ಮ", "ધર્મ", "ਧਰਮ", "ധർമ",
+        "دھرم", "دارما", "дхарм", "ダルマ",
+    ),
+    "vyasa": (
+        "व्यास", "ব্যাস", "வியாச", "వ్యాస", "ವ್ಯಾಸ", "વ્યાસ", "ਵਿਆਸ", "വ്യാസ",
+        "ویاس", "فياسا", "вьяс", "ヴィヤーサ", "毗耶娑",
+    ),
+    "duryodhana": (
+        "दुर्योधन", "দুর্যোধন", "துரியோதன", "దుర్యోధన", "ದುರ್ಯೋಧನ", "દુર્યોધન", "ਦੁਰਯੋਧਨ", "ദുര്യോധന",
+        "دریودھن", "دوريودانا", "дурьодхан", "ドゥルヨーダナ",
+    ),
+    "yudhishthira": (
+        "युधिष्ठिर", "যুধিষ্ঠির", "யுதிஷ்டிர", "యుధిష్ఠిర", "ಯುಧಿಷ್ಠಿರ", "યુધિષ્ઠિર", "ਯੁਧਿਸ਼ਠਰ", "യുധിഷ്ഠിര",
+        "یدھشٹر", "يودهيشتيرا", "юдхиштхир", "ユディシュティラ",
+    ),
+}
+
+def fold_latin(text: str) -> str:
+    """Strip diacritics from Latin letters (Mahābhārata -> Mahabharata) so accented questions hit
+    the English patterns. Other scripts are left untouched and resolved through the lexicon."""
+    out = []
+    for c in text:
+        base = unicodedata.normalize("NFKD", c)[:1]
+        out.append(base if c.isalpha() and not c.isascii() and base.isascii() and base.isalpha() else c)
+    return "".join(out)
+
+# Inflections that attach to a name inside the same word, per script (postpositions written as
+# separate words need nothing). Aliases are stems, so only stem + one of these is accepted.
+ALIAS_SUFFIXES: Dict[str, Tuple[str, ...]] = {
+    "DEVANAGARI": ("", "ों", "ा", "ाचा", "ाची", "ाचे", "ाला", "ाने", "ांनी", "ांचा", "ांची", "ांचे", "ांना",
+                   "चा", "ची", "चे", "ला", "ने"),
+    "BENGALI": ("", "ের", "র", "কে", "দের", "রা", "ে"),
+    "TAMIL": ("", "ன்", "னின்", "னை", "னுக்கு", "ர்", "ரின்", "ரை", "ருக்கு", "ர்கள்", "ர்களின்", "ர்களை",
+              "ம்", "த்தின்", "த்தை", "த்தில்", "யின்", "யில்", "யை"),
+    "TELUGU": ("", "ుడు", "ుని", "ునికి", "ులు", "ుల", "ులకు", "ం", "ంలో", "ా", "లో", "కి", "ని", "ి", "ికి"),
+    "KANNADA": ("", "ನು", "ನ", "ನಿಗೆ", "ನನ್ನು", "ರು", "ರ", "ರಿಗೆ", "ದ", "ವು", "ದಲ್ಲಿ", "ಯ", "ಯಲ್ಲಿ", "ಯು"),
+    "GUJARATI": ("", "ને", "નો", "ની", "ના", "એ", "માં", "ો"),
+    "GURMUKHI": ("", "ਾਂ", "ਾ", "ੇ"),
+    "MALAYALAM": ("", "ൻ", "ന്റെ", "നെ", "ന്", "ർ", "രുടെ", "രെ", "ം", "ത്തിന്റെ", "യിൽ", "യുടെ", "യെ", "ി"),
+    "ARABIC": ("", "وں", "ؤں", "ی", "ے"),
+    "CYRILLIC": ("", "а", "у", "ы", "е", "ой", "ом", "ов", "ам", "ами", "ах", "и", "ю", "я", "ей"),
+}
+# Arabic attaches "and"/"the"/"with" in front of the word instead.
+ALIAS_PREFIXES: Dict[str, Tuple[str, ...]] = {
+    "ARABIC": ("", "ال", "و", "ب", "ل", "وال", "بال", "لل"),
+}
+
+def _script(ch: str) -> str:
+    return unicodedata.name(ch, "").split(" ", 1)[0]
+
+def _word_class(ch: str) -> Optional[str]:
+    if unicodedata.category(ch)[0] not in "LMN":
+        return None
+    if "\u3040" <= ch <= "\u309f":
+        return "hiragana"
+    if "\u30a0" <= ch <= "\u30ff":
+        return "katakana"
+    if "\u3400" <= ch <= "\u4dbf" or "\u4e00" <= ch <= "\u9fff":
+        return "han"
+    return "word"
+
+def iter_words(text: str) -> Iterable[Tuple[str, str]]:
+    """(class, word) runs: letters/marks/digits of one class. Kana and Han runs split from each
+    other, which is as close to word boundaries as unsegmented Japanese/Chinese gets."""
+    text = text.replace("\u200c", "").replace("\u200d", "")  # ZWNJ/ZWJ are word-internal
+    cur, cls = [], None
+    for ch in text:
+        c = _word_class(ch)
+        if c != cls and cur:
+            yield cls, "".join(cur)
+            cur = []
+        cls = c
+        if c is not None:
+            cur.append(ch)
+    if cur:
+        yield cls, "".join(cur)
+
+class MultilingualLexicon:
+    def __init__(self, aliases: Dict[str, Tuple[str, ...]] = MULTILINGUAL_ALIASES):
+        # Whole-word forms (alias plus its script's affixes) -> English term. Chinese has no
+        # word boundaries, so Han aliases (all multi-character names) are matched inside runs.
+        self.word_to_term: Dict[str, str] = {}
+        han: Dict[str, str] = {}
+        for term, al in aliases.items():
+            for a in al:
+                a = unicodedata.normalize("NFC", a).lower()
+                script = _script(a[0])
+                if script == "CJK":
+                    han[a] = term
+                    continue
+                for pre in ALIAS_PREFIXES.get(script, ("",)):
+                    for suf in ALIAS_SUFFIXES.get(script, ("",)):
+                        self.word_to_term.setdefault(pre + a + suf, term)
+        self.han_to_term = han
+        # Longest alias first so e.g. a full compound wins over a shorter name inside it.
+        self.han_pattern = re.compile("|".join(re.escape(a) for a in sorted(han, key=len, reverse=True))) if han else None
+
+    def english_terms(self, text: str) -> List[str]:
+        terms: List[str] = []
+        for cls, word in iter_words(unicodedata.normalize("NFC", text or "").lower()):
+            if cls == "han":
+                found = [self.han_to_term[m.group(0)] for m in self.han_pattern.finditer(word)] if self.han_pattern else []
+            else:
+                found = [self.word_to_term[word]] if word in self.word_to_term else []
+            for term in found:
+                if term not in terms:
+                    terms.append(term)
+        return terms
+
 # ---------------------------
 # Gate (Mahabharata-only)
 # ---------------------------
 class MahabharataGate:
     def __init__(self):
         self.kw = re.compile(
-            r"\b(mahabharata|mahabaratha|mahabharat|pandava|kaurava|kurukshetra|bhishma|drona|karna|"
+            r"\b(mahabharata|mahabaratha|mahabharat|pandavas?|kauravas?|kurukshetra|bhishma|drona|karna|"
             r"krishna|arjuna|yudhishthira|bhima|nakula|sahadeva|draupadi|duryodhana|ashvatthama|"
             r"vyasa|indraprastha|hastinapura|gita|bhagavad\s*gita|dharma|karma|exile|dice\s*game|"
             r"swayamvara|bakasura|vidura|shakuni|kunti|gandhari|dhritarashtra|pandu|"
@@ -192,60 +356,432 @@ class MahabharataGate:
             r"epic|mythology|hindu|vedas|sanskrit|ancient\s*india|indian\s*epic)\b",
             re.I
         )
+        self.lexicon = MultilingualLexicon()
+    def to_english_query(self, question: str) -> str:
+        """Accent-folded question plus the English terms of any native-script names it mentions,
+        so the English gate, FACT_OVERRIDES and retriever work without translating the query."""
+        question = question or ""
+        # IAST folds to e.g. "Krsna"/"Bhisma"; map such spellings to the names the gate knows.
+        folded = re.sub(r"[A-Za-z]+", lambda m: NAME_VARIANTS.get(m.group(0).lower(), m.group(0)),
+                        fold_latin(question))
+        if folded.isascii():
+            return folded
+        terms = self.lexicon.english_terms(question)
+        return f"{folded} {' '.join(terms)}".strip() if terms else folded
     def is_mahabharata(self, question: str) -> bool:
-        return bool(self.kw.search(question or ""))
+        return bool(self.kw.search(self.to_english_query(question)))
+
+# ---------------------------
+# Query normalization
+# ---------------------------
+# Function words only. Question words (who/how/why...), temporal words (before/after/during/
+# then...) and negations (not/no/never...) are kept since they change the answer.
+STOP_WORDS = frozenset("""
+a an the of in on at to for from by with about into over and or but
+is are was were be been being am do does did done has have had having can could would should
+will shall may might must i me my we our you your he him his she her it its they them their
+this that these those there here please tell explain describe know say said according as so
+than also just very some any all much many more most epic story
+""".split())
+
+# Words that say nothing about *where* the answer is: a scoped search only stays narrow when a
+# nearby sentence matches the question's other (content) words.
+QUESTION_WORDS = frozenset("who whom whose what which when where why how".split())
+SCOPE_IGNORED_WORDS = STOP_WORDS | QUESTION_WORDS | frozenset("before after during then not no never".split())
+
+# Common spellings of names -> the form used in the corpus and FACT_OVERRIDES.
+NAME_VARIANTS: Dict[str, str] = {
+    "mahabaratha": "mahabharata", "mahabharatha": "mahabharata", "mahabharat": "mahabharata",
+    "mahabarata": "mahabharata", "mahabaratam": "mahabharata", "mahabharatam": "mahabharata",
+    "pandav": "pandava", "kaurav": "kaurava", "krishn": "krishna", "krsna": "krishna",
+    "arjun": "arjuna", "bheem": "bhima", "bhim": "bhima", "bhisma": "bhishma", "bheeshma": "bhishma",
+    "dronacharya": "drona", "karn": "karna", "droupadi": "draupadi",
+    "duryodhan": "duryodhana", "yudhisthira": "yudhishthira", "yudhishtira": "yudhishthira",
+    "yudhishthir": "yudhishthira", "vyas": "vyasa", "vedvyas": "vyasa", "vedavyasa": "vyasa",
+    "geeta": "gita", "bhagwat": "bhagavad", "bhagavat": "bhagavad", "kurukshetr": "kurukshetra",
+    "dharm": "dharma", "karm": "karma", "sakuni": "shakuni",
+    # IAST spellings after fold_latin (Kṛṣṇa -> krsna, Kurukṣetra -> kuruksetra, ...)
+    "kuruksetra": "kurukshetra", "dhrtarastra": "dhritarashtra", "asvatthama": "ashvatthama",
+    "asvatthaman": "ashvatthama", "sikhandi": "shikhandi", "sikhandin": "shikhandi",
+    "dhrstadyumna": "dhrishtadyumna", "vaisampayana": "vaishampayana", "naimisa": "naimisha",
+    "yudhisthir": "yudhishthira", "bhagavadgita": "bhagavad gita",
+}
+
+class QueryNormalizer:
+    """Reduce a question to a canonical token set, so questions that differ only in casing,
+    punctuation, stop words, plurals or name spellings share one cache entry. Words in other
+    scripts are kept verbatim (NFC, lowercased): they carry the question, not just the name."""
+
+    def __init__(self, stop_words: frozenset = STOP_WORDS, variants: Dict[str, str] = NAME_VARIANTS):
+        self.stop_words = stop_words
+        self.variants = variants
+
+    def stem(self, tok: str) -> str:
+        if len(tok) > 4 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        return self.variants.get(tok, tok)
+
+    def key(self, query: str) -> frozenset:
+        text = unicodedata.normalize("NFC", fold_latin(query or "")).lower()
+        return frozenset(self.stem(w) if w.isascii() else w
+                         for _, w in iter_words(text) if w not in self.stop_words)
+
+# ---------------------------
+# Compact sentence store
+# ---------------------------
+# Verses are addressed by (Book_id, Chapter_id, Verse_id), matching the frontend's collection.
+VerseKey = Tuple[int, int, int]
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[\.\!\?])\s+')
+TOKEN_RE = re.compile(r"[a-z]+")
+IMPORTANT_TERMS = ('pandava', 'kaurava', 'krishna', 'arjuna', 'bhishma', 'drona', 'karna',
+                   'draupadi', 'duryodhana', 'vyasa', 'kurukshetra', 'bhagavad gita', 'dharma')
+
+def split_sentences(text: str) -> List[str]:
+    return [s for s in SENTENCE_SPLIT_RE.split((text or "").strip()) if s]
+
+class Vocabulary:
+    """Append-only table of interned lowercase tokens shared by every segment."""
+    MAX_CACHED_KEYWORDS = 4096
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.words: List[str] = []
+        self._contains: Dict[str, Tuple[int, List[int]]] = {}
+        self._lock = threading.Lock()
+
+    def intern(self, word: str) -> int:
+        tid = self.ids.get(word)
+        if tid is None:
+            with self._lock:
+                tid = self.ids.get(word)
+                if tid is None:
+                    tid = len(self.words)
+                    self.words.append(sys.intern(word))
+                    self.ids[self.words[tid]] = tid
+        return tid
+
+    def containing(self, keyword: str) -> List[int]:
+        """Token ids whose word contains `keyword` (the old substring match), scanning only
+        vocabulary added since the last lookup of the same keyword."""
+        scanned, ids = self._contains.get(keyword, (0, []))
+        n = len(self.words)
+        if scanned < n:
+            ids = ids + [i for i in range(scanned, n) if keyword in self.words[i]]
+            if len(self._contains) >= self.MAX_CACHED_KEYWORDS:
+                self._contains.clear()
+            self._contains[keyword] = (n, ids)
+        return ids
+
+class SentenceRecord:
+    __slots__ = ("text", "key", "tokens", "bonus")
+
+    def __init__(self, text: str, key: Optional[VerseKey], vocab: Vocabulary):
+        lower = text.lower()
+        self.text = text
+        self.key = key
+        self.tokens = array("I", sorted({vocab.intern(w) for w in TOKEN_RE.findall(lower)}))
+        self.bonus = sum(1 for term in IMPORTANT_TERMS if term in lower)
+
+# ---------------------------
+# Index segments (incremental verse updates)
+# ---------------------------
+class IndexSegment:
+    """Immutable batch of verse entries plus tombstones for verses deleted by this batch.
+    Newer segments shadow older ones, so an update only ever writes a new small segment."""
+    __slots__ = ("seg_id", "entries", "deletes", "records", "postings", "by_bonus", "books", "chapters")
+
+    def __init__(self, seg_id: int, entries: Dict[Optional[VerseKey], List[str]], vocab: Vocabulary,
+                 deletes: Iterable[VerseKey] = ()):
+        self.seg_id = seg_id
+        self.entries = entries
+        self.deletes = frozenset(deletes)
+        self.records = [SentenceRecord(s, k, vocab) for k, sents in entries.items() for s in sents]
+        postings: Dict[int, array] = {}
+        for i, rec in enumerate(self.records):
+            for tid in rec.tokens:
+                postings.setdefault(tid, array("I")).append(i)
+        self.postings = postings
+        # Sentences ordered by their static term bonus; unmatched sentences are served from here.
+        self.by_bonus = array("I", sorted(range(len(self.records)), key=lambda i: -self.records[i].bonus))
+        # Per-book / per-chapter sub-indexes (record ids in verse order) for scoped questions.
+        books: Dict[int, array] = {}
+        chapters: Dict[Tuple[int, int], array] = {}
+        for i in sorted((i for i, r in enumerate(self.records) if r.key is not None), key=lambda i: self.records[i].key):
+            b, c, _ = self.records[i].key
+            books.setdefault(b, array("I")).append(i)
+            chapters.setdefault((b, c), array("I")).append(i)
+        self.books = books
+        self.chapters = chapters
+
+    def size(self) -> int:
+        return len(self.entries) + len(self.deletes)
+
+    @staticmethod
+    def merge(older: "IndexSegment", newer: "IndexSegment", seg_id: int, vocab: Vocabulary,
+              drop_tombstones: bool) -> "IndexSegment":
+        entries = {k: v for k, v in older.entries.items() if k not in newer.deletes and k not in newer.entries}
+        entries.update(newer.entries)
+        deletes = set() if drop_tombstones else (set(older.deletes) - set(newer.entries)) | newer.deletes
+        return IndexSegment(seg_id, entries, vocab, deletes)
+
+    def to_records(self) -> Iterable[dict]:
+        for k, sents in self.entries.items():
+            yield {"key": list(k) if k is not None else None, "sentences": sents}
+        for k in self.deletes:
+            yield {"key": list(k), "deleted": True}
+
+    @classmethod
+    def from_records(cls, seg_id: int, records: Iterable[dict], vocab: Vocabulary) -> "IndexSegment":
+        entries, deletes = {}, set()
+        for r in records:
+            key = tuple(r["key"]) if r.get("key") is not None else None
+            if r.get("deleted"):
+                deletes.add(key)
+            else:
+                entries[key] = r["sentences"]
+        return cls(seg_id, entries, vocab, deletes)
+
+class IndexSnapshot:
+    """Consistent, read-only view over a tuple of segments. Queries hold one snapshot for their
+    whole duration; writers publish a new snapshot with a single reference swap."""
+    __slots__ = ("segments", "_sentences")
+
+    def __init__(self, segments: Tuple[IndexSegment, ...]):
+        self.segments = segments
+        self._sentences: Optional[List[str]] = None
+
+    def is_live(self, seg_pos: int, key: Optional[VerseKey]) -> bool:
+        if key is None:
+            return True
+        for seg in self.segments[seg_pos + 1:]:
+            if key in seg.entries or key in seg.deletes:
+                return False
+        return True
+
+    @property
+    def sentences(self) -> List[str]:
+        if self._sentences is None:
+            self._sentences = [rec.text for pos, seg in enumerate(self.segments)
+                               for rec in seg.records if self.is_live(pos, rec.key)]
+        return self._sentences
 
 # ---------------------------
 # Simple retriever from in-memory paragraph
 # ---------------------------
 class ParagraphRetriever:
-    def __init__(self, paragraph: str):
+    MANIFEST = "manifest.json"
+
+    def __init__(self, paragraph: str, index_dir: Optional[str] = None, max_segments: int = 8):
         self.text = paragraph
-        # Split into sentences and create a more sophisticated search
-        self.sentences = re.split(r'(?<=[\.\!\?])\s+', self.text)
-        
-    def retrieve(self, question: str, max_chars: int = 900) -> str:
-        q = (question or "").lower()
-        keywords = re.findall(r"[a-zA-Z]+", q)
-        
-        # Enhanced scoring system
-        scored = []
-        for s in self.sentences:
-            sl = s.lower()
-            score = 0
-            
-            # Basic keyword matching
-            for k in keywords:
-                if k in sl:
-                    score += 1
-                    # Bonus for exact word matches
-                    if re.search(r'\b' + re.escape(k) + r'\b', sl):
-                        score += 2
-            
-            # Bonus for character names and important terms
-            important_terms = ['pandava', 'kaurava', 'krishna', 'arjuna', 'bhishma', 'drona', 'karna', 
-                             'draupadi', 'duryodhana', 'vyasa', 'kurukshetra', 'bhagavad gita', 'dharma']
-            for term in important_terms:
-                if term in sl:
-                    score += 1
-            
-            scored.append((score, s))
-        
-        # Sort by score (descending)
-        scored.sort(key=lambda x: x[0], reverse=True)
-        
+        self.index_dir = index_dir
+        self.max_segments = max_segments
+        self.vocab = Vocabulary()
+        self._write_lock = threading.Lock()
+        self._next_seg_id = 1
+        self.version = 0  # bumped on every update; lets callers key caches on index contents
+        segments: Tuple[IndexSegment, ...] = (IndexSegment(0, {None: split_sentences(paragraph)}, self.vocab),)
+        if index_dir and os.path.exists(os.path.join(index_dir, self.MANIFEST)):
+            segments = segments + self._load_segments(index_dir)
+        self._snapshot = IndexSnapshot(segments)
+
+    @property
+    def sentences(self) -> List[str]:
+        return self._snapshot.sentences
+
+    # ---- incremental updates ----
+    def update(self, upserts: Optional[Dict[VerseKey, str]] = None, deletes: Iterable[VerseKey] = ()) -> int:
+        """Add/replace verses (upserts) and remove verses (deletes) without re-indexing the corpus.
+        Cost is proportional to the change (plus amortized segment merges). Returns the new segment id."""
+        entries = {tuple(k): split_sentences(v) for k, v in (upserts or {}).items()}
+        deleted = {tuple(k) for k in deletes} - set(entries)
+        with self._write_lock:
+            seg = IndexSegment(self._next_seg_id, entries, self.vocab, deleted)
+            self._next_seg_id += 1
+            segments = self._merge_tail(self._snapshot.segments + (seg,))
+            if self.index_dir:
+                self._persist(segments)
+            self._snapshot = IndexSnapshot(segments)
+            self.version += 1
+            return seg.seg_id
+
+    def add_verse(self, key: VerseKey, text: str) -> int:
+        return self.update(upserts={key: text})
+
+    def delete_verse(self, key: VerseKey) -> int:
+        return self.update(deletes=[key])
+
+    def _merge_tail(self, segments: Tuple[IndexSegment, ...]) -> Tuple[IndexSegment, ...]:
+        # Tiered merge: fold the newest segment into its predecessor while the predecessor is
+        # no larger, or when there are too many segments. The base segment (index 0) is never
+        # merged, so tombstones are dropped once a merge lands directly on top of it.
+        segs = list(segments)
+        while len(segs) > 2 and (segs[-2].size() <= segs[-1].size() or len(segs) > self.max_segments):
+            newer, older = segs.pop(), segs.pop()
+            segs.append(IndexSegment.merge(older, newer, self._next_seg_id, self.vocab,
+                                           drop_tombstones=len(segs) == 1))
+            self._next_seg_id += 1
+        return tuple(segs)
+
+    # ---- on-disk segments ----
+    def _seg_path(self, seg_id: int) -> str:
+        return os.path.join(self.index_dir, f"seg-{seg_id:08d}.jsonl")
+
+    def _persist(self, segments: Tuple[IndexSegment, ...]) -> None:
+        os.makedirs(self.index_dir, exist_ok=True)
+        on_disk = segments[1:]
+        for seg in on_disk:
+            path = self._seg_path(seg.seg_id)
+            if os.path.exists(path):
+                continue  # segments are immutable; only new/merged ones are written
+            self._atomic_write(path, "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in seg.to_records()))
+        manifest = {"segments": [seg.seg_id for seg in on_disk], "next_seg_id": self._next_seg_id}
+        self._atomic_write(os.path.join(self.index_dir, self.MANIFEST), json.dumps(manifest))
+        live = {os.path.basename(self._seg_path(seg.seg_id)) for seg in on_disk}
+        for name in os.listdir(self.index_dir):
+            if name.startswith("seg-") and name not in live:
+                try:
+                    os.remove(os.path.join(self.index_dir, name))
+                except OSError:
+                    pass
+
+    def _load_segments(self, index_dir: str) -> Tuple[IndexSegment, ...]:
+        with open(os.path.join(index_dir, self.MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        segs = []
+        for seg_id in manifest.get("segments", []):
+            with open(self._seg_path(seg_id), "r", encoding="utf-8") as f:
+                segs.append(IndexSegment.from_records(seg_id, (json.loads(line) for line in f if line.strip()), self.vocab))
+        self._next_seg_id = manifest.get("next_seg_id", len(segs) + 1)
+        return tuple(segs)
+
+    @staticmethod
+    def _atomic_write(path: str, data: str) -> None:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _score(self, snap: IndexSnapshot, keywords: List[str]) -> Dict[Tuple[int, int], int]:
+        # Same scoring as the original per-sentence loop (+1 substring, +2 more for a whole-word
+        # match, per keyword occurrence), but driven by postings so only matching sentences are touched.
+        scores: Dict[Tuple[int, int], int] = {}
+        for k in keywords:
+            exact = self.vocab.ids.get(k)
+            containing = self.vocab.containing(k)
+            for pos, seg in enumerate(snap.segments):
+                hit = set()
+                for tid in containing:
+                    hit.update(seg.postings.get(tid, ()))
+                for i in hit:
+                    scores[(pos, i)] = scores.get((pos, i), 0) + 1
+                if exact is not None:
+                    for i in seg.postings.get(exact, ()):
+                        scores[(pos, i)] += 2
+        return scores
+
+    def _ranked(self, snap: IndexSnapshot, keywords: List[str]) -> Iterable[Tuple[int, SentenceRecord]]:
+        """Lazily yield (score, record) in descending score, ties in corpus order, so the caller
+        only pays for the handful of sentences it actually selects."""
+        scores = self._score(snap, keywords)
+        matched = [(-(sc + snap.segments[pos].records[i].bonus), pos, i)
+                   for (pos, i), sc in scores.items() if snap.is_live(pos, snap.segments[pos].records[i].key)]
+        heapq.heapify(matched)
+
+        def pop_matched():
+            while matched:
+                yield heapq.heappop(matched)
+
+        def unmatched(pos: int, seg: IndexSegment):
+            for i in seg.by_bonus:
+                if (pos, i) not in scores and snap.is_live(pos, seg.records[i].key):
+                    yield (-seg.records[i].bonus, pos, i)
+
+        streams = [pop_matched()] + [unmatched(pos, seg) for pos, seg in enumerate(snap.segments)]
+        for neg, pos, i in heapq.merge(*streams):
+            yield -neg, snap.segments[pos].records[i]
+
+    # ---- scoped (verse / chapter / book) retrieval ----
+    @staticmethod
+    def _scope_levels(scope: Tuple[Optional[int], Optional[int], Optional[int]], verse_radius: int):
+        """Widening (book, chapter-or-None, key filter) levels for a scope, narrowest first."""
+        book, chapter, verse = scope
+        if book is None:
+            return []
+        levels = []
+        if chapter is not None and verse is not None:
+            levels.append((book, chapter, lambda k: abs(k[2] - verse) <= verse_radius))
+        if chapter is not None:
+            levels.append((book, chapter, lambda k: True))
+        levels.append((book, None, lambda k: True))
+        return levels
+
+    def _ranked_scoped(self, snap: IndexSnapshot, keywords: List[str], book: int, chapter: Optional[int],
+                       pred) -> Tuple[int, Iterable[Tuple[int, SentenceRecord]]]:
+        """Rank only the records of one book/chapter sub-index, scoring each record from its
+        token-id array. Returns (most content keywords matched by one record, lazy ranking)."""
+        terms = [(self.vocab.ids.get(k), set(self.vocab.containing(k)), k not in SCOPE_IGNORED_WORDS)
+                 for k in keywords]
+        heap, best_content = [], 0
+        for pos, seg in enumerate(snap.segments):
+            ids = seg.chapters.get((book, chapter), ()) if chapter is not None else seg.books.get(book, ())
+            for i in ids:
+                rec = seg.records[i]
+                if not pred(rec.key) or not snap.is_live(pos, rec.key):
+                    continue
+                toks = set(rec.tokens)
+                kw = content = 0
+                for exact, containing, is_content in terms:
+                    if not containing.isdisjoint(toks):
+                        kw += 3 if exact in toks else 1
+                        content += is_content
+                best_content = max(best_content, content)
+                heap.append((-(kw + rec.bonus), pos, i))
+        heapq.heapify(heap)
+
+        def pop():
+            while heap:
+                neg, pos, i = heapq.heappop(heap)
+                yield -neg, snap.segments[pos].records[i]
+        return (best_content if heap else -1), pop()
+
+    @staticmethod
+    def _select(ranked: Iterable[Tuple[int, SentenceRecord]], max_chars: int) -> List[str]:
         chosen, total = [], 0
-        for sc, s in scored:
+        for sc, rec in ranked:
+            s = rec.text
             if sc <= 0 and chosen:
                 break
             if total + len(s) + 1 > max_chars and chosen:
                 break
             chosen.append(s)
             total += len(s) + 1
+        return chosen
+
+    def retrieve(self, question: str, max_chars: int = 900,
+                 scope: Optional[Tuple[Optional[int], Optional[int], Optional[int]]] = None,
+                 verse_radius: int = 5) -> str:
+        """scope=(Book_id, Chapter_id, Verse_id), any trailing part may be None. Scoped questions
+        search the verse's neighborhood first, then its chapter, then its book, and only fall
+        back to the whole corpus when none of those has a sentence matching at least half of the
+        question's content words (function and question words like "the"/"who" don't count)."""
+        snap = self._snapshot
+        q = (question or "").lower()
+        keywords = re.findall(r"[a-zA-Z]+", q)
+        n_content = len({k for k in keywords if k not in SCOPE_IGNORED_WORDS})
+        needed = (n_content + 1) // 2
+
+        chosen: List[str] = []
+        for book, chapter, pred in self._scope_levels(scope or (None, None, None), verse_radius):
+            best_content, ranked = self._ranked_scoped(snap, keywords, book, chapter, pred)
+            if best_content >= needed:  # -1 = empty level; no content words -> nearest verses
+                chosen = self._select(ranked, max_chars)
+                break
+        if not chosen:
+            chosen = self._select(self._ranked(snap, keywords), max_chars)
         
         if not chosen:
             # Fallback to first few sentences
-            chosen = self.sentences[:3]
+            chosen = snap.sentences[:3]
         
         ans = " ".join(chosen).strip()
         if len(ans) > max_chars:
@@ -253,32 +789,225 @@ class ParagraphRetriever:
         
         return ans
 
+# ---------------------------
+# Decoding policy (adaptive generation budget)
+# ---------------------------
+class DecodingPolicy:
+    """Picks how much generation a paraphrase can afford: 'beam' (the original num_beams=4),
+    'greedy', or 'skip' (serve the retrieved text as-is). Decisions use the prompt length, the
+    number of paraphrases already in flight, and an EWMA of observed ms per new token per mode
+    against a latency SLO, so the service degrades to retrieval-only under load.
+
+    Observations are normalized by the queue depth they ran at, so a burst of contention does
+    not look like a slow model. A mode ruled out by its estimate is re-tried (probed) on an idle
+    request once every probe_interval_s, and the probe's measurement replaces the estimate, so a
+    cold first call or a past overload can't disable paraphrasing for good."""
+
+    MODES = ("beam", "greedy")
+
+    def __init__(self, slo_ms: float = 2000.0, max_new_tokens: int = 196, beam_max_input_tokens: int = 192,
+                 skip_queue_depth: int = 4, min_new_tokens_cap: int = 32, new_tokens_ratio: float = 0.75,
+                 probe_interval_s: float = 30.0):
+        self.slo_ms = slo_ms
+        self.max_new_tokens = max_new_tokens
+        self.beam_max_input_tokens = beam_max_input_tokens
+        self.skip_queue_depth = skip_queue_depth
+        self.min_new_tokens_cap = min_new_tokens_cap
+        self.new_tokens_ratio = new_tokens_ratio
+        self.probe_interval_s = probe_interval_s
+        self.ms_per_token: Dict[str, Optional[float]] = {m: None for m in self.MODES}
+        self._last_run: Dict[str, float] = {m: 0.0 for m in self.MODES}
+        self._probing: set = set()
+        self._lock = threading.Lock()
+
+    def token_cap(self, n_input_tokens: int) -> int:
+        # A paraphrase should not be much longer than the context it rewrites.
+        return max(self.min_new_tokens_cap, min(self.max_new_tokens, int(n_input_tokens * self.new_tokens_ratio)))
+
+    def predicted_ms(self, mode: str, cap: int, queue_depth: int) -> float:
+        rate = self.ms_per_token.get(mode)
+        # Unknown cost: optimistic until the first observation. Queued work shares the CPU.
+        return 0.0 if rate is None else rate * cap * (queue_depth + 1)
+
+    def _claim_probe(self, mode: str, queue_depth: int) -> bool:
+        # Only on an otherwise idle service, and at most once per interval per mode.
+        if queue_depth > 0:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if mode in self._probing or now - self._last_run[mode] < self.probe_interval_s:
+                return False
+            self._probing.add(mode)
+            self._last_run[mode] = now
+            return True
+
+    def release_probe(self, mode: str) -> None:
+        with self._lock:
+            self._probing.discard(mode)
+
+    def choose(self, n_input_tokens: int, queue_depth: int) -> Tuple[str, dict]:
+        if queue_depth >= self.skip_queue_depth:
+            return "skip", {}
+        cap = self.token_cap(n_input_tokens)
+        beam = dict(do_sample=False, num_beams=4, early_stopping=True, max_new_tokens=cap)
+        greedy = dict(do_sample=False, num_beams=1, max_new_tokens=cap)
+        beam_ok = n_input_tokens <= self.beam_max_input_tokens
+        if beam_ok and self.predicted_ms("beam", cap, queue_depth) <= self.slo_ms:
+            return "beam", beam
+        greedy_fits = self.predicted_ms("greedy", cap, queue_depth) <= self.slo_ms
+        # Cheapest probe first: beam is only re-tried while greedy is known to fit.
+        if greedy_fits and beam_ok and self._claim_probe("beam", queue_depth):
+            return "beam", beam
+        if greedy_fits or self._claim_probe("greedy", queue_depth):
+            return "greedy", greedy
+        return "skip", {}
+
+    def observe(self, mode: str, elapsed_ms: float, new_tokens: int, queue_depth: int = 0,
+                alpha: float = 0.2) -> None:
+        """new_tokens: tokens actually generated. Time is divided by (queue_depth + 1), the same
+        sharing factor predicted_ms applies, so the estimate stays the unloaded cost."""
+        if mode not in self.ms_per_token:
+            return
+        if new_tokens <= 0:
+            self.release_probe(mode)
+            return
+        rate = elapsed_ms / new_tokens / (queue_depth + 1)
+        with self._lock:
+            self._last_run[mode] = time.monotonic()
+            prev = self.ms_per_token[mode]
+            if prev is None or mode in self._probing:
+                self.ms_per_token[mode] = rate  # a probe is a fresh measurement
+            else:
+                self.ms_per_token[mode] = (1 - alpha) * prev + alpha * rate
+            self._probing.discard(mode)
+
 # ---------------------------
 # Rephraser (lightweight)
 # ---------------------------
 class Rephraser:
-    def __init__(self):
-        self.pipe = None
-        self._init_pipe()
-    def _init_pipe(self):
-        try:
+    def __init__(self, policy: Optional[DecodingPolicy] = None, manager=None):
+        """manager: optional model_lifecycle.ModelManager; the pipeline is then loaded through it
+        (and may be unloaded when idle or over the memory budget) instead of held forever."""
+        self.model_name: Optional[str] = None
+        self.policy = policy or DecodingPolicy()
+        self.manager = manager
+        self._inflight = 0
+        self._inflight_lock = threading.Lock()
+        if manager is not None:
+            manager.register("rephraser", self._load_pipe)
+            self.pipe = None
+            self.available = manager.get("rephraser") is not None
+        else:
+            self.pipe = self._load_pipe()
+            self.available = self.pipe is not None
+    def _load_pipe(self):
+        # Pinned models from model_store, tried in a fixed order; the fallback is announced
+        # so a run on t5-small is never mistaken for one on the paraphraser.
+        from model_store import pipeline_args
+        for name in ("paraphraser", "paraphraser-fallback"):
+            try:
+                pipe = pipeline("text2text-generation", **pipeline_args(name), max_new_tokens=196)
+                self.model_name = name
+                print(f"[i] Rephraser model: {name}")
+                return pipe
+            except Exception as e:
+                print(f"[!] Could not load {name} rephraser model: {e}")
+        print("[!] No rephraser model available; answers use retrieved text as-is.")
+        return None
+    def _acquire(self):
+        if self.manager is not None:
+            return self.manager.use("rephraser")
+        return nullcontext(self.pipe)
+    def _count_tokens(self, pipe, text: str) -> int:
+        tok = getattr(pipe, "tokenizer", None)
+        if tok is not None:
             try:
-                self.pipe = pipeline("text2text-generation", model="ramsrigouthamg/t5_paraphraser", max_new_tokens=196)
+                return len(tok(text)["input_ids"])
             except Exception:
-                self.pipe = pipeline("text2text-generation", model="t5-small", max_new_tokens=196)
-        except Exception:
-            self.pipe = None
-    def paraphrase(self, context_answer: str, question: str) -> str:
-        if not context_answer.strip() or self.pipe is None:
+                pass
+        return int(len(text.split()) * 1.3) + 1
+    def _generate(self, pipe, prompt: str, gen_kwargs: dict) -> str:
+        out = pipe(prompt, **gen_kwargs)
+        txt = out[0]["generated_text"].strip()
+        return re.sub(r"(?i)^paraphrase:\s*", "", txt).strip()
+    def paraphrase(self, context_answer: str, question: str, gen_kwargs: Optional[dict] = None) -> str:
+        """Rewrite the retrieved context. gen_kwargs forces fixed decoding settings (used by the
+        benchmark); otherwise the DecodingPolicy picks beam/greedy/skip for this request."""
+        if not context_answer.strip() or not self.available:
             return context_answer
+        prompt = f"Paraphrase to directly answer.\nQ: {question}\nA: {context_answer}\nParaphrase:"
+        with self._inflight_lock:
+            queue_depth = self._inflight
+            self._inflight += 1
         try:
-            prompt = f"Paraphrase to directly answer.\nQ: {question}\nA: {context_answer}\nParaphrase:"
-            out = self.pipe(prompt, do_sample=False, num_beams=4)
-            txt = out["generated_text"].strip()
-            txt = re.sub(r"(?i)^paraphrase:\s*", "", txt).strip()
+            with self._acquire() as pipe:
+                if pipe is None:
+                    return context_answer
+                if gen_kwargs is not None:
+                    mode, kwargs = "fixed", gen_kwargs
+                else:
+                    mode, kwargs = self.policy.choose(self._count_tokens(pipe, prompt), queue_depth)
+                if mode == "skip":
+                    return context_answer
+                t0 = time.perf_counter()
+                try:
+                    txt = self._generate(pipe, prompt, kwargs)
+                except Exception:
+                    self.policy.release_probe(mode)
+                    raise
+                elapsed_ms = (time.perf_counter() - t0) * 1000.0
+                new_tokens = self._count_tokens(pipe, txt) if txt else 0
+            self.policy.observe(mode, elapsed_ms, new_tokens, queue_depth)
             return txt or context_answer
         except Exception:
             return context_answer
+        finally:
+            with self._inflight_lock:
+                self._inflight -= 1
+
+BENCH_QUESTIONS = [
+    "Why did the Pandavas go to exile?",
+    "Tell me about Draupadi's swayamvara",
+    "What happened at Ekachakra with Bakasura?",
+    "How did the Pandavas escape the lacquer palace?",
+    "Who narrated the Mahabharata at the snake sacrifice?",
+    "What does the epic teach about duty and desire?",
+]
+
+def _token_f1(a: str, b: str) -> float:
+    ta, tb = re.findall(r"\w+", a.lower()), re.findall(r"\w+", b.lower())
+    if not ta or not tb:
+        return float(ta == tb)
+    common = sum(min(ta.count(w), tb.count(w)) for w in set(ta))
+    if common == 0:
+        return 0.0
+    p, r = common / len(ta), common / len(tb)
+    return 2 * p * r / (p + r)
+
+def benchmark_rephraser(retriever: "ParagraphRetriever", rephraser: Rephraser,
+                        questions: List[str] = BENCH_QUESTIONS) -> Dict[str, dict]:
+    """Quality vs latency of the adaptive policy against the original fixed settings
+    (num_beams=4, max_new_tokens=196). Quality is token F1 against the baseline output."""
+    baseline_kwargs = dict(do_sample=False, num_beams=4, max_new_tokens=196)
+    results: Dict[str, dict] = {}
+    baseline_out: Dict[str, str] = {}
+    for name in ("baseline", "adaptive"):
+        lat, f1 = [], []
+        for q in questions:
+            ctx = retriever.retrieve(q, max_chars=900)
+            t0 = time.perf_counter()
+            out = rephraser.paraphrase(ctx, q, gen_kwargs=baseline_kwargs if name == "baseline" else None)
+            lat.append((time.perf_counter() - t0) * 1000.0)
+            if name == "baseline":
+                baseline_out[q] = out
+            f1.append(_token_f1(out, baseline_out[q]))
+        lat.sort()
+        results[name] = {
+            "mean_ms": sum(lat) / len(lat),
+            "p95_ms": lat[min(len(lat) - 1, int(0.95 * len(lat)))],
+            "f1_vs_baseline": sum(f1) / len(f1),
+        }
+    return results
 
 # ---------------------------
 # Translator (Argos Translate, EN->XX only)
@@ -331,18 +1060,126 @@ class Translator:
         except Exception:
             return text
 
+# ---------------------------
+# Precomputed fixed responses
+# ---------------------------
+class ResponseTable:
+    """(message id, lang) -> text for the refusal and every FACT_OVERRIDES answer.
+    Message ids hash the English text, so editing an answer invalidates only its own rows.
+    Filled by precompute() at startup (or loaded from a JSON file); missing languages fall
+    back to one live translation, which is then remembered."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.table: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for row in json.load(f):
+                        self.table[(row["id"], row["lang"])] = row["text"]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[!] Ignoring unreadable response table {path}: {e}")
+
+    @staticmethod
+    def message_id(text_en: str) -> str:
+        return hashlib.sha256(text_en.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def messages() -> List[str]:
+        return [NOT_ALLOWED_MSG_EN] + [ans for _, ans in FACT_OVERRIDES]
+
+    def lookup(self, text_en: str, lang: str, tx: "Translator") -> str:
+        if lang == DEFAULT_SRC_LANG:
+            return text_en
+        key = (self.message_id(text_en), lang)
+        hit = self.table.get(key)
+        if hit is not None:
+            return hit
+        out = tx.translate(text_en, src_lang=DEFAULT_SRC_LANG, tgt_lang=lang)
+        # Translator returns the English text when the pair is unavailable; don't pin that.
+        if out and out != text_en:
+            with self._lock:
+                self.table[key] = out
+        return out
+
+    def precompute(self, tx: "Translator", langs: Iterable[str]) -> int:
+        added = 0
+        for lang in langs:
+            if lang == DEFAULT_SRC_LANG:
+                continue
+            for text_en in self.messages():
+                if (self.message_id(text_en), lang) not in self.table:
+                    before = len(self.table)
+                    self.lookup(text_en, lang, tx)
+                    added += len(self.table) - before
+        if self.path:
+            self.save()
+        return added
+
+    def save(self) -> None:
+        with self._lock:
+            rows = [{"id": i, "lang": l, "text": t} for (i, l), t in self.table.items()]
+        d = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=d, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+# ---------------------------
+# Answer cache (pre-translation)
+# ---------------------------
+class AnswerCache:
+    """LRU of English answers (retrieval + paraphrase) keyed by normalized query and index
+    version. Stored before translation, so one entry serves every target language."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            val = self._data.get(key)
+            if val is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return val
+
+    def put(self, key: tuple, value: str) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
 # ---------------------------
 # Orchestrator
 # ---------------------------
 class MahabharataChatbot:
-    def __init__(self):
+    def __init__(self, index_dir: Optional[str] = None, responses_file: Optional[str] = None,
+                 precompute_responses: bool = False, slo_ms: float = 2000.0,
+                 rephraser: Optional[Rephraser] = None, translator: Optional[Translator] = None,
+                 models=None):
         self.gate = MahabharataGate()
-        self.retriever = ParagraphRetriever(MAHA_MASTER_EN)
-        self.rephraser = Rephraser()
-        self.tx = Translator()
+        self.retriever = ParagraphRetriever(MAHA_MASTER_EN, index_dir=index_dir)
+        self.models = models
+        self.rephraser = rephraser or Rephraser(DecodingPolicy(slo_ms=slo_ms), manager=models)
+        self.tx = translator or Translator()
+        self.responses = ResponseTable(responses_file)
+        self.normalizer = QueryNormalizer()
+        self.answers = AnswerCache()
+        if precompute_responses:
+            print("[i] Precomputing refusal/override answers for all languages ...")
+            n = self.responses.precompute(self.tx, LANG_OPTIONS.values())
+            print(f"[i] Response table ready ({len(self.responses.table)} entries, {n} new).")
 
     def _not_allowed(self, target_lang: str) -> str:
-        return self.tx.translate(NOT_ALLOWED_MSG_EN, src_lang="en", tgt_lang=target_lang)
+        return self.responses.lookup(NOT_ALLOWED_MSG_EN, target_lang, self.tx)
 
     def _override(self, question: str) -> Optional[str]:
         for pat, ans in FACT_OVERRIDES:
@@ -350,27 +1187,40 @@ class MahabharataChatbot:
                 return ans
         return None
 
-    def ask(self, question: str, target_lang: str) -> Tuple[str, Optional[str]]:
+    def _answer_en(self, query: str, scope: Optional[Tuple[Optional[int], Optional[int], Optional[int]]] = None) -> str:
+        key = (self.normalizer.key(query), scope, self.retriever.version)
+        cached = self.answers.get(key)
+        if cached is not None:
+            return cached
+        context = self.retriever.retrieve(query, max_chars=900, scope=scope)
+        answer_en = self.rephraser.paraphrase(context, query)
+        # Don't pin a load-shed answer (paraphrase skipped) for later, quieter requests.
+        if answer_en != context or not self.rephraser.available:
+            self.answers.put(key, answer_en)
+        return answer_en
+
+    def ask(self, question: str, target_lang: str,
+            scope: Optional[Tuple[Optional[int], Optional[int], Optional[int]]] = None) -> Tuple[str, Optional[str]]:
+        """scope=(Book_id, Chapter_id, Verse_id) of the verse the user is reading, if any."""
         if not question or not question.strip():
             return self._not_allowed(target_lang), None
-        if not self.gate.is_mahabharata(question):
+        query = self.gate.to_english_query(question)
+        if not self.gate.kw.search(query):
             return self._not_allowed(target_lang), None
 
-        direct = self._override(question)
+        direct = self._override(query)
         if direct:
-            answer_en = direct
-        else:
-            answer_en = self.retriever.retrieve(question, max_chars=900)
-            answer_en = self.rephraser.paraphrase(answer_en, question)
+            return self.responses.lookup(direct, target_lang, self.tx), "Mahabharata (in-memory)"
 
+        answer_en = self._answer_en(query, scope)
         final = self.tx.translate(answer_en, src_lang=DEFAULT_SRC_LANG, tgt_lang=target_lang)
         return final, "Mahabharata (in-memory)"
 
 # ---------------------------
 # CLI
 # ---------------------------
-def run_cli():
-    bot = MahabharataChatbot()
+def run_cli(**bot_opts):
+    bot = MahabharataChatbot(**bot_opts)
 
     keys = list(LANG_OPTIONS.keys())
     print("\nSelect answer language:")
@@ -415,12 +1265,12 @@ def run_cli():
 # ---------------------------
 # API (prototype)
 # ---------------------------
-def run_api(host: str, port: int):
+def run_api(host: str, port: int, **bot_opts):
     if not FASTAPI_AVAILABLE:
         print("[!] FastAPI not available. Install: pip install fastapi uvicorn pydantic")
         sys.exit(1)
 
-    bot = MahabharataChatbot()
+    bot = MahabharataChatbot(**bot_opts)
     app = FastAPI(title="Mahabharata Chatbot API", version="2.0.0", description="A comprehensive Mahabharata Q&A system with multilingual support")
 
     app.add_middleware(
@@ -434,12 +1284,26 @@ def run_api(host: str, port: int):
     class AskIn(BaseModel):
         question: str
         target_lang: str = "en"
+        # Optional verse the user is looking at; narrows retrieval to its neighborhood.
+        Book_id: int | None = None
+        Chapter_id: int | None = None
+        Verse_id: int | None = None
 
     class AskOut(BaseModel):
         answer: str
         language: str
         source_title: str | None
 
+    class VerseIn(BaseModel):
+        Book_id: int
+        Chapter_id: int
+        Verse_id: int
+        text: str = ""
+
+    class VerseUpdateIn(BaseModel):
+        upserts: list[VerseIn] = []
+        deletes: list[VerseIn] = []
+
     @app.get("/languages")
     def languages():
         return [{"name": k, "code": v} for k, v in LANG_OPTIONS.items()]
@@ -447,26 +1311,64 @@ def run_api(host: str, port: int):
     @app.post("/ask", response_model=AskOut)
     def ask(payload: AskIn):
         lang = payload.target_lang if payload.target_lang in LANG_OPTIONS.values() else "en"
-        ans, src = bot.ask(payload.question, lang)
+        scope = (payload.Book_id, payload.Chapter_id, payload.Verse_id) if payload.Book_id is not None else None
+        ans, src = bot.ask(payload.question, lang, scope=scope)
         return AskOut(answer=ans, language=lang, source_title=src)
 
-    print(f"[i] API running at http://{host}:{port}  (POST /ask, GET /languages)")
+    @app.post("/verses")
+    def update_verses(payload: VerseUpdateIn):
+        seg_id = bot.retriever.update(
+            upserts={(v.Book_id, v.Chapter_id, v.Verse_id): v.text for v in payload.upserts},
+            deletes=[(v.Book_id, v.Chapter_id, v.Verse_id) for v in payload.deletes],
+        )
+        return {"segment": seg_id, "upserted": len(payload.upserts), "deleted": len(payload.deletes)}
+
+    @app.get("/metrics")
+    def metrics():
+        out = {"answer_cache_entries": len(bot.answers._data)}
+        if bot.models is not None:
+            out["models"] = bot.models.metrics()
+        return out
+
+    print(f"[i] API running at http://{host}:{port}  (POST /ask, POST /verses, GET /languages, GET /metrics)")
     uvicorn.run(app, host=host, port=port)
 
 # ---------------------------
 # Entrypoint
 # ---------------------------
 def main():
+    from model_lifecycle import add_lifecycle_args, manager_from_args
+
     parser = argparse.ArgumentParser(description="Comprehensive Mahabharata Chatbot - Multilingual Q&A system focused exclusively on the Mahabharata epic and Hindu mythology. Features enhanced knowledge base, intelligent search, and API integration.")
     parser.add_argument("--serve", action="store_true", help="Run as HTTP API instead of CLI")
     parser.add_argument("--host", type=str, default="127.0.0.1", help="API host")
     parser.add_argument("--port", type=int, default=8000, help="API port")
+    parser.add_argument("--index-dir", type=str, default=None, help="Directory for persisted incremental verse index segments")
+    parser.add_argument("--responses-file", type=str, default=None, help="JSON file holding precomputed refusal/override answers per language")
+    parser.add_argument("--offline", action="store_true", help="Only load preloaded models (see model_store.py); never download")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="Latency target for paraphrasing; slower decoding modes are skipped")
+    parser.add_argument("--bench-rephraser", action="store_true", help="Compare adaptive decoding with the fixed beam-search settings and exit")
+    parser.add_argument("--precompute-responses", action="store_true", help="Translate refusal/override answers for all languages at startup")
+    add_lifecycle_args(parser)
     args = parser.parse_args()
+    if args.offline:
+        from model_store import set_offline
+        set_offline(True)
+
+    if args.bench_rephraser:
+        retriever = ParagraphRetriever(MAHA_MASTER_EN, index_dir=args.index_dir)
+        results = benchmark_rephraser(retriever, Rephraser(DecodingPolicy(slo_ms=args.slo_ms)))
+        for name, r in results.items():
+            print(f"{name:9s} mean={r['mean_ms']:8.1f}ms  p95={r['p95_ms']:8.1f}ms  F1 vs baseline={r['f1_vs_baseline']:.3f}")
+        return
 
+    bot_opts = dict(index_dir=args.index_dir, responses_file=args.responses_file,
+                    precompute_responses=args.precompute_responses, slo_ms=args.slo_ms)
     if args.serve:
-        run_api(args.host, args.port)
+        # Only the long-running API unloads idle models; the CLI session keeps its model.
+        run_api(args.host, args.port, models=manager_from_args(args), **bot_opts)
     else:
-        run_cli()
+        run_cli(**bot_opts)
 
 if __name__ == "__main__":
     main()
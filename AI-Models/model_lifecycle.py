@@ -0,0 +1,209 @@
+"""
+model_lifecycle.py
+------------------
+Load-on-demand / unload-when-idle management for the models behind the AI services.
+
+- Models are registered with a loader; `with models.use(name) as m:` loads on first use.
+  Loading is single-flight: concurrent requests for a cold model wait for one load.
+- Each model's last use and resident size (parameter + buffer bytes) are tracked.
+- Models idle longer than `idle_unload_s` are unloaded by a background reaper; before a
+  load that would push the total past `budget_bytes`, least-recently-used idle models
+  are unloaded first, and when a request finishes while the total is still over budget,
+  idle models (including the one just used) are unloaded. Models in use are never unloaded.
+- The budget is per process: each service (chatbot, translate, summarize) runs its own
+  manager, so give each its share of the box (e.g. three services on 4 GB -> ~1300 MB each).
+- metrics() reports per-model state plus load/unload counters for a /metrics endpoint.
+
+Used by chatbot.py (rephraser), translate.py (M2M100) and summarize.py (BART).
+"""
+
+from __future__ import annotations
+import gc
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+def estimate_bytes(obj: Any) -> int:
+    """Parameter + buffer bytes of the torch module held by obj (a module, a pipeline, or a
+    wrapper with a .model attribute). 0 if nothing measurable is found."""
+    module = obj if hasattr(obj, "parameters") else getattr(obj, "model", None)
+    if not hasattr(module, "parameters"):
+        return 0
+    try:
+        total = sum(p.numel() * p.element_size() for p in module.parameters())
+        total += sum(b.numel() * b.element_size() for b in module.buffers())
+        return int(total)
+    except Exception:
+        return 0
+
+
+class _Entry:
+    __slots__ = ("name", "loader", "obj", "size", "last_used", "refs", "load_lock",
+                 "loads", "unloads", "load_seconds")
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.obj: Any = None
+        self.size = 0  # last measured size; kept after unload as the estimate for the next load
+        self.last_used = 0.0
+        self.refs = 0
+        self.load_lock = threading.Lock()
+        self.loads = 0
+        self.unloads = 0
+        self.load_seconds = 0.0
+
+
+class ModelManager:
+    def __init__(self, budget_bytes: int = 0, idle_unload_s: float = 0.0):
+        """budget_bytes=0 -> no ceiling; idle_unload_s=0 -> never unload for idleness."""
+        self.budget_bytes = budget_bytes
+        self.idle_unload_s = idle_unload_s
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.unloads_by_reason: Dict[str, int] = {"idle": 0, "budget": 0, "manual": 0}
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        if idle_unload_s > 0:
+            self._reaper = threading.Thread(target=self._reap_loop, name="model-reaper", daemon=True)
+            self._reaper.start()
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        with self._lock:
+            self._entries[name] = _Entry(name, loader)
+
+    # ---- use / load ----
+    @contextmanager
+    def use(self, name: str) -> Iterator[Any]:
+        entry = self._entries[name]
+        with self._lock:
+            entry.refs += 1
+        try:
+            yield self._ensure_loaded(entry)
+        finally:
+            with self._lock:
+                entry.refs -= 1
+                entry.last_used = time.monotonic()
+            # A service with a single model can only get back under budget once that model is idle.
+            self._make_room(0)
+
+    def get(self, name: str) -> Any:
+        """Load (if needed) without holding a reference; used for warm-up at startup."""
+        with self.use(name) as obj:
+            return obj
+
+    def _ensure_loaded(self, entry: _Entry) -> Any:
+        obj = entry.obj
+        if obj is not None:
+            return obj
+        # Single-flight: the first caller loads, the rest block here and reuse its result.
+        with entry.load_lock:
+            if entry.obj is not None:
+                return entry.obj
+            self._make_room(entry.size, exclude=entry.name)
+            t0 = time.perf_counter()
+            print(f"[i] Loading model '{entry.name}' ...", flush=True)
+            obj = entry.loader()
+            elapsed = time.perf_counter() - t0
+            size = estimate_bytes(obj)
+            with self._lock:
+                entry.obj = obj
+                entry.size = size or entry.size
+                entry.loads += 1
+                entry.load_seconds += elapsed
+                entry.last_used = time.monotonic()
+            print(f"[i] Model '{entry.name}' loaded in {elapsed:.1f}s ({entry.size / 2**20:.0f} MB)", flush=True)
+            if 0 < self.budget_bytes < entry.size:
+                print(f"[warn] Model '{entry.name}' is larger than the memory budget; it will be unloaded "
+                      f"after every request", flush=True)
+            self._make_room(0, exclude=entry.name)
+            return obj
+
+    # ---- unload ----
+    def _unload(self, entry: _Entry, reason: str) -> bool:
+        with self._lock:
+            if entry.obj is None or entry.refs > 0:
+                return False
+            entry.obj = None
+            entry.unloads += 1
+            self.unloads_by_reason[reason] = self.unloads_by_reason.get(reason, 0) + 1
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+        print(f"[i] Unloaded model '{entry.name}' ({reason})", flush=True)
+        return True
+
+    def unload(self, name: str) -> bool:
+        return self._unload(self._entries[name], "manual")
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size for e in self._entries.values() if e.obj is not None)
+
+    def _make_room(self, incoming: int, exclude: Optional[str] = None) -> None:
+        if self.budget_bytes <= 0:
+            return
+        while self.resident_bytes() + incoming > self.budget_bytes:
+            with self._lock:
+                idle = [e for e in self._entries.values()
+                        if e.obj is not None and e.refs == 0 and e.name != exclude]
+            if not idle:
+                return  # everything resident is busy; load anyway rather than fail the request
+            victim = min(idle, key=lambda e: e.last_used)
+            if not self._unload(victim, "budget"):
+                return
+
+    def _reap_loop(self) -> None:
+        interval = max(1.0, min(30.0, self.idle_unload_s / 4))
+        while not self._stop.wait(interval):
+            now = time.monotonic()
+            for entry in list(self._entries.values()):
+                if entry.obj is not None and entry.refs == 0 and now - entry.last_used >= self.idle_unload_s:
+                    self._unload(entry, "idle")
+
+    def close(self) -> None:
+        self._stop.set()
+
+    # ---- metrics ----
+    def metrics(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            models = {
+                e.name: {
+                    "loaded": e.obj is not None,
+                    "resident_bytes": e.size if e.obj is not None else 0,
+                    "in_use": e.refs,
+                    "idle_seconds": round(now - e.last_used, 1) if e.last_used else None,
+                    "loads": e.loads,
+                    "unloads": e.unloads,
+                    "load_seconds_total": round(e.load_seconds, 3),
+                }
+                for e in self._entries.values()
+            }
+            unloads = dict(self.unloads_by_reason)
+        return {
+            "budget_bytes": self.budget_bytes,
+            "idle_unload_s": self.idle_unload_s,
+            "resident_bytes": sum(m["resident_bytes"] for m in models.values()),
+            "loads_total": sum(m["loads"] for m in models.values()),
+            "unloads_total": unloads,
+            "models": models,
+        }
+
+
+def add_lifecycle_args(p) -> None:
+    p.add_argument("--memory-budget-mb", type=int, default=0,
+                   help="Per-process model memory budget: unload least-recently-used idle models to stay "
+                        "under this size (0 = no limit).")
+    p.add_argument("--idle-unload-s", type=float, default=0.0,
+                   help="Unload models unused for this many seconds; reloaded on next request (0 = never).")
+
+
+def manager_from_args(args) -> ModelManager:
+    return ModelManager(budget_bytes=args.memory_budget_mb * 2**20, idle_unload_s=args.idle_unload_s)
@@ -0,0 +1,268 @@
+"""
+model_store.py
+--------------
+Pinned, pre-fetched model artifacts for chatbot.py, translate.py and summarize.py.
+
+- Every model the services use is listed in MODEL_PINS (repo id + revision).
+- `preload` downloads them into one shared cache directory, records the resolved commit and
+  per-file sha256/size in a lock file, and converts checkpoints without *.safetensors to
+  safetensors (loaded via mmap, much faster than pickle-based .bin weights).
+- At runtime, model_source() points loaders at the local, locked copy. With offline mode on
+  (--offline / KATHA_MODELS_OFFLINE=1) nothing ever touches the network: a missing model is
+  an error instead of a surprise 1-2 GB download.
+
+USAGE:
+  python model_store.py preload                 # all models
+  python model_store.py preload translator      # just one
+  python model_store.py verify                  # re-hash files against the lock
+  python model_store.py list
+
+Environment:
+  KATHA_MODEL_CACHE      cache directory (default: AI-Models/.model-cache)
+  KATHA_MODELS_OFFLINE   1 -> local_files_only everywhere
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+
+# --------------------------
+# Pins
+# --------------------------
+# Set "revision" to a commit hash to pin a model upstream; "main" is resolved to a commit
+# once by `preload` and that commit is what every later load uses (see the lock file).
+MODEL_PINS: Dict[str, Dict[str, str]] = {
+    "summarizer": {"repo_id": "facebook/bart-large-cnn", "revision": "main"},
+    "translator": {"repo_id": "facebook/m2m100_418M", "revision": "main"},
+    "paraphraser": {"repo_id": "ramsrigouthamg/t5_paraphraser", "revision": "main"},
+    "paraphraser-fallback": {"repo_id": "t5-small", "revision": "main"},
+}
+
+# Weight/tokenizer files worth fetching; skips TF/Flax/ONNX duplicates.
+ALLOW_PATTERNS = ["*.json", "*.safetensors", "*.bin", "*.model", "*.txt", "*.spm"]
+
+LOCK_NAME = "models.lock.json"
+
+
+def cache_dir() -> str:
+    return os.environ.get("KATHA_MODEL_CACHE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".model-cache")
+
+
+def offline() -> bool:
+    return os.environ.get("KATHA_MODELS_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+def set_offline(value: bool = True) -> None:
+    os.environ["KATHA_MODELS_OFFLINE"] = "1" if value else "0"
+    if value:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+
+# --------------------------
+# Lock file
+# --------------------------
+def _lock_path() -> str:
+    return os.path.join(cache_dir(), LOCK_NAME)
+
+
+def load_lock() -> Dict[str, dict]:
+    try:
+        with open(_lock_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_lock(lock: Dict[str, dict]) -> None:
+    os.makedirs(cache_dir(), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache_dir(), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=2, sort_keys=True)
+    os.replace(tmp, _lock_path())
+
+
+def _sha256(path: str, bufsize: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _manifest(root: str) -> Dict[str, dict]:
+    files = {}
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            full = os.path.join(dirpath, name)
+            rel = os.path.relpath(full, root).replace(os.sep, "/")
+            files[rel] = {"sha256": _sha256(full), "size": os.path.getsize(full)}
+    return files
+
+
+# --------------------------
+# Runtime lookup
+# --------------------------
+def model_source(name: str) -> Tuple[str, dict]:
+    """
+    Return (model id or local path, extra from_pretrained kwargs) for a pinned model.
+    Prefers the preloaded local copy (converted safetensors dir if present). Without a local
+    copy, falls back to the hub id at the pinned revision -- or raises in offline mode. That
+    fallback uses the default Hugging Face cache, shared by model and tokenizer loads alike;
+    the private cache_dir() only ever holds what `preload` fetched and locked.
+    """
+    if offline():
+        set_offline(True)  # make sure transformers/hub see it too
+    pin = MODEL_PINS[name]
+    entry = load_lock().get(name)
+    if entry and pin["revision"] not in ("main", entry.get("commit")):
+        print(f"[!] Pin for '{name}' changed since preload; run: python model_store.py preload --update {name}", file=sys.stderr)
+        entry = None
+    if entry:
+        path = entry.get("converted_path") or entry["snapshot_path"]
+        if _quick_check(path, entry.get("files", {})):
+            return path, {"local_files_only": True}
+        print(f"[!] Preloaded files for '{name}' are missing or changed; run: python model_store.py verify", file=sys.stderr)
+    if offline():
+        raise RuntimeError(f"Model '{name}' ({pin['repo_id']}) is not preloaded and offline mode is on. "
+                           f"Run: python model_store.py preload {name}")
+    return pin["repo_id"], {"revision": pin["revision"]}
+
+
+def pipeline_args(name: str) -> dict:
+    """model_source() shaped for transformers.pipeline(**pipeline_args(name), ...)."""
+    src, kw = model_source(name)
+    args: dict = {"model": src}
+    if "revision" in kw:
+        args["revision"] = kw.pop("revision")
+    if kw:
+        args["model_kwargs"] = kw
+    return args
+
+
+def _quick_check(path: str, files: Dict[str, dict]) -> bool:
+    # Startup check is size-only so it stays O(number of files); `verify` re-hashes everything.
+    if not os.path.isdir(path):
+        return False
+    for rel, meta in files.items():
+        full = os.path.join(path, rel)
+        if not os.path.isfile(full) or os.path.getsize(full) != meta["size"]:
+            return False
+    return True
+
+
+# --------------------------
+# Preload / verify
+# --------------------------
+def preload(name: str, convert: bool = True, update: bool = False) -> dict:
+    from huggingface_hub import snapshot_download
+
+    pin = MODEL_PINS[name]
+    lock = load_lock()
+    # An explicit pin wins; otherwise stay on the locked commit unless asked to update.
+    revision = pin["revision"]
+    if revision == "main" and not update:
+        revision = lock.get(name, {}).get("commit") or revision
+    print(f"[i] Fetching {name}: {pin['repo_id']}@{revision} ...", flush=True)
+    snap = snapshot_download(pin["repo_id"], revision=revision, cache_dir=cache_dir(),
+                             allow_patterns=ALLOW_PATTERNS, local_files_only=offline())
+    entry = {"repo_id": pin["repo_id"], "commit": os.path.basename(snap), "snapshot_path": snap}
+
+    has_safetensors = any(f.endswith(".safetensors") for f in os.listdir(snap))
+    if convert and not has_safetensors:
+        entry["converted_path"] = _convert_to_safetensors(name, snap)
+    target = entry.get("converted_path") or snap
+    print(f"[i] Hashing {target} ...", flush=True)
+    entry["files"] = _manifest(target)
+
+    lock[name] = entry
+    _save_lock(lock)
+    print(f"[i] {name} ready at commit {entry['commit']}", flush=True)
+    return entry
+
+
+def _convert_to_safetensors(name: str, snap: str) -> str:
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM, AutoTokenizer
+
+    out = os.path.join(cache_dir(), "converted", name)
+    print(f"[i] Converting {name} to safetensors -> {out}", flush=True)
+    config = AutoConfig.from_pretrained(snap, local_files_only=True)
+    model = AutoModelForSeq2SeqLM.from_pretrained(snap, config=config, local_files_only=True)
+    tokenizer = AutoTokenizer.from_pretrained(snap, local_files_only=True)
+    tmp = out + ".tmp"
+    model.save_pretrained(tmp, safe_serialization=True)
+    tokenizer.save_pretrained(tmp)
+    if os.path.isdir(out):
+        import shutil
+        shutil.rmtree(out)
+    os.replace(tmp, out)
+    return out
+
+
+def verify(names: Optional[List[str]] = None) -> bool:
+    lock = load_lock()
+    ok = True
+    for name in names or list(MODEL_PINS):
+        entry = lock.get(name)
+        if not entry:
+            print(f"[!] {name}: not preloaded")
+            ok = False
+            continue
+        root = entry.get("converted_path") or entry["snapshot_path"]
+        bad = []
+        for rel, meta in entry.get("files", {}).items():
+            full = os.path.join(root, rel)
+            if not os.path.isfile(full) or _sha256(full) != meta["sha256"]:
+                bad.append(rel)
+        if bad:
+            ok = False
+            print(f"[!] {name}: checksum mismatch in {', '.join(bad)}")
+        else:
+            print(f"[ok] {name}: {len(entry.get('files', {}))} files verified ({entry['commit']})")
+    return ok
+
+
+# --------------------------
+# Entrypoint
+# --------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Preload, pin and verify model artifacts for the AI services.")
+    parser.add_argument("command", choices=["preload", "verify", "list"])
+    parser.add_argument("names", nargs="*", help=f"Models (default: all): {', '.join(MODEL_PINS)}")
+    parser.add_argument("--no-convert", action="store_true", help="Skip safetensors conversion")
+    parser.add_argument("--offline", action="store_true", help="Only use files already in the cache")
+    parser.add_argument("--update", action="store_true", help="Re-resolve unpinned ('main') models instead of keeping the locked commit")
+    args = parser.parse_args()
+
+    unknown = [n for n in args.names if n not in MODEL_PINS]
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)}")
+    if args.offline:
+        set_offline(True)
+    names = args.names or list(MODEL_PINS)
+
+    if args.command == "list":
+        lock = load_lock()
+        for name in names:
+            pin, entry = MODEL_PINS[name], lock.get(name, {})
+            print(f"{name:22s} {pin['repo_id']:34s} {entry.get('commit', '(not preloaded)')}")
+    elif args.command == "preload":
+        failed = []
+        for name in names:
+            try:
+                preload(name, convert=not args.no_convert, update=args.update)
+            except Exception as e:
+                print(f"[!] {name}: {e}", file=sys.stderr)
+                failed.append(name)
+        sys.exit(1 if failed else 0)
+    else:
+        sys.exit(0 if verify(names) else 1)
+
+
+if __name__ == "__main__":
+    main()
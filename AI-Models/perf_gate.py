@@ -0,0 +1,554 @@
+"""
+perf_gate.py
+------------
+Benchmark suite + regression gate for chatbot.py, translate.py and summarize.py.
+
+Runs on a CPU-only box with tiny deterministic stand-in models (no weights are loaded), so
+it measures the code around the models: retrieval, chunking, caching and orchestration.
+Timings run on seeded synthetic data. Each timed repeat is paired with a fixed pure-Python
+calibration pass run just before it, and a metric is the median of those time/calibration
+ratios scaled by the run's reference calibration ("calibration_s"). compare() rescales the
+current run to the baseline's calibration, so a machine that is uniformly slower or busier
+(CPU steal, throttling, a noisy neighbour) does not read as a regression.
+
+Metrics (direction in METRICS):
+  retrieval_ns_per_query    ParagraphRetriever.retrieve over the epic text + synthetic verses
+  scoped_retrieval_ns       same, scoped to one chapter
+  summarize_chunk_mb_s      split_into_chunks throughput
+  translate_chunk_mb_s      Translator._split_into_chunks throughput
+  stream_chunk_mb_s         streaming sentence/chunk generators throughput
+  chatbot_e2e_p95_ms        MahabharataChatbot.ask with stub rephraser/translator
+  summarize_e2e_ms          summarize_text per document with a stub summarizer
+  batch_items_per_s         batch_cli.run_batch over a JSONL verse file (in-process, stub model)
+  translate_many_ms         Translator.translate_many into 3 languages with a tiny random M2M100
+                            (needs real torch/transformers; skipped otherwise)
+  peak_rss_mb               peak resident memory of the benchmark process
+  import_<module>_ms        cold import time of each script (fresh interpreter)
+
+USAGE:
+  python perf_gate.py run --out perf_current.json
+  python perf_gate.py baseline                      # writes perf_baseline.json
+  python perf_gate.py compare                       # run + compare, exit 1 on regression
+  python perf_gate.py compare --threshold 0.10 --metric-threshold import_chatbot_ms=0.5
+  python perf_gate.py compare --current perf_current.json   # compare two stored runs
+
+Correctness tests (gate, cache keys, index updates, ...) live in tests/ and run with pytest.
+
+torch, transformers and argostranslate are replaced by empty stand-in modules when they are
+not installed: the benchmarks never call into them, so retrieval/chunking/batching metrics are
+measured on any CPU-only box. A metric present in the baseline but missing from the current
+run fails the gate.
+
+A change only counts as a regression when it exceeds both the relative threshold and the
+metric's absolute floor (ABS_FLOOR). When `compare` runs the suite itself and something
+regresses, the suite is re-run (--retries) and each metric keeps its best value: noise does
+not repeat, a real regression does.
+"""
+
+from __future__ import annotations
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import types
+from typing import Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+DEFAULT_BASELINE = os.path.join(HERE, "perf_baseline.json")
+SEED = 1234
+
+# metric -> "lower" or "higher" is better
+METRICS: Dict[str, str] = {
+    "retrieval_ns_per_query": "lower",
+    "scoped_retrieval_ns": "lower",
+    "summarize_chunk_mb_s": "higher",
+    "translate_chunk_mb_s": "higher",
+    "stream_chunk_mb_s": "higher",
+    "chatbot_e2e_p95_ms": "lower",
+    "summarize_e2e_ms": "lower",
+    "batch_items_per_s": "higher",
+    "translate_many_ms": "lower",
+    "peak_rss_mb": "lower",
+    "import_chatbot_ms": "lower",
+    "import_summarize_ms": "lower",
+    "import_translate_ms": "lower",
+}
+
+# Smallest absolute change (in the metric's unit) that can count as a regression.
+ABS_FLOOR: Dict[str, float] = {
+    "retrieval_ns_per_query": 2_000.0,
+    "scoped_retrieval_ns": 2_000.0,
+    "chatbot_e2e_p95_ms": 0.25,
+    "summarize_e2e_ms": 0.05,
+    "translate_many_ms": 20.0,
+    "summarize_chunk_mb_s": 4.0,
+    "translate_chunk_mb_s": 6.0,
+    "stream_chunk_mb_s": 4.0,
+    "batch_items_per_s": 5_000.0,
+    "peak_rss_mb": 5.0,
+    "import_chatbot_ms": 20.0,
+    "import_summarize_ms": 20.0,
+    "import_translate_ms": 20.0,
+}
+
+# Not timings: reported as measured, never rescaled by the calibration.
+UNTIMED = frozenset({"peak_rss_mb"})
+
+# Third-party modules the scripts import at load time -> names they take from them.
+STUB_MODULES: Dict[str, tuple] = {
+    "torch": (),
+    "transformers": ("pipeline", "M2M100ForConditionalGeneration", "M2M100Tokenizer"),
+    "argostranslate": (),
+    "argostranslate.package": (),
+    "argostranslate.translate": (),
+}
+
+WORDS = ("arjuna krishna karna bhishma drona draupadi yudhishthira bhima duryodhana kunti vidura "
+         "shakuni dharma war chariot arrow forest exile kingdom vow sage battle brother teacher "
+         "river palace dice night day army bow fate duty king queen son father mother").split()
+
+
+def _installed(module: str) -> bool:
+    top = module.split(".")[0]
+    if top in sys.modules:
+        return sys.modules[top].__spec__ is not None  # stand-ins have no spec
+    return importlib.util.find_spec(top) is not None
+
+
+def install_stubs() -> List[str]:
+    """Put empty stand-ins for missing STUB_MODULES into sys.modules (so chatbot.py's
+    auto-installer never runs). Returns the stubbed names."""
+    stubbed = []
+    for name, attrs in STUB_MODULES.items():
+        if name in sys.modules or _installed(name):
+            continue
+        mod = types.ModuleType(name)
+        for attr in attrs:
+            setattr(mod, attr, _unavailable(f"{name}.{attr}"))
+        sys.modules[name] = mod
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, mod)
+        stubbed.append(name)
+    return stubbed
+
+
+def _unavailable(what: str):
+    def fn(*args, **kwargs):
+        raise RuntimeError(f"{what} is a perf_gate stand-in; install the real package to use it")
+    return fn
+
+
+_CAL_WORDS = (" ".join(WORDS) + " ") * 1500
+_CAL_REF: Optional[float] = None
+
+
+def _calibration_pass() -> float:
+    """A fixed ~10-20 ms pure-Python workload (regex, dict, sort, join) as a yardstick for how
+    fast this machine is running right now."""
+    t0 = time.perf_counter()
+    toks = re.findall(r"[a-z]+", _CAL_WORDS)
+    counts: Dict[str, int] = {}
+    for t in toks:
+        counts[t] = counts.get(t, 0) + 1
+    toks.sort()
+    " ".join(reversed(toks)).upper()
+    return time.perf_counter() - t0
+
+
+def calibrate(repeats: int = 21) -> float:
+    global _CAL_REF
+    _CAL_REF = statistics.median(_calibration_pass() for _ in range(repeats))
+    return _CAL_REF
+
+
+def _best_time(fn: Callable[[], None], repeats: int = 9) -> float:
+    """Seconds per fn() call, normalized: median over repeats of fn time / calibration time
+    (measured back to back), times the run's reference calibration."""
+    if _CAL_REF is None:
+        calibrate()
+    ratios = []
+    for _ in range(repeats):
+        cal = _calibration_pass()
+        t0 = time.perf_counter()
+        fn()
+        ratios.append((time.perf_counter() - t0) / cal)
+    return statistics.median(ratios) * _CAL_REF
+
+
+def _p95(samples: List[float]) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+
+# --------------------------
+# Synthetic, seeded inputs
+# --------------------------
+def synthetic_sentences(n: int, rng: random.Random) -> List[str]:
+    out = []
+    for _ in range(n):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 22))]
+        out.append(" ".join(words).capitalize() + rng.choice(".!?"))
+    return out
+
+
+def synthetic_text(n_chars: int, rng: random.Random) -> str:
+    parts, total = [], 0
+    while total < n_chars:
+        s = synthetic_sentences(1, rng)[0]
+        parts.append(s)
+        total += len(s) + 1
+    return " ".join(parts)
+
+
+QUERIES = [
+    "Who is Karna?", "Why did the Pandavas go to exile?", "What did Krishna teach Arjuna?",
+    "Tell me about the dice game and Shakuni", "How did Bhishma fall in the war?",
+    "What is dharma for a king?", "Who was Drona's best student?", "Describe Draupadi's vow",
+]
+
+# On-topic questions that miss FACT_OVERRIDES, so ask() exercises retrieval + paraphrase.
+E2E_QUERIES = [
+    "What happened at Ekachakra?", "Who was Vidura?", "Tell me about Bakasura",
+    "Why did Shakuni plot against them?", "What did Sauti narrate in the Naimisha forest?",
+    "Who is Kunti?", "What was the lacquer house?", "Tell me about Hastinapura",
+]
+
+# --------------------------
+# Stand-in models
+# --------------------------
+class StubSummarizer:
+    """Summarization pipeline stand-in: first two sentences, truncated."""
+
+    def __call__(self, text: str, max_length: int = 120, min_length: int = 50, do_sample: bool = False):
+        head = " ".join(text.split(". ")[:2])
+        return [{"summary_text": head[: max_length * 4]}]
+
+
+def _stub_text2text(prompt: str, **kwargs):
+    ans = prompt.split("\nA: ", 1)[-1].rsplit("\nParaphrase:", 1)[0]
+    return [{"generated_text": "Paraphrase: " + ans[:400]}]
+
+
+# --------------------------
+# Benchmarks
+# --------------------------
+def bench_summarize(results: Dict[str, Optional[float]], rng: random.Random) -> None:
+    import summarize
+
+    text = synthetic_text(2_000_000, rng)
+    mb = len(text.encode("utf-8")) / 1e6
+    results["summarize_chunk_mb_s"] = mb / _best_time(lambda: summarize.split_into_chunks(text), 5)
+    results["stream_chunk_mb_s"] = mb / _best_time(
+        lambda: sum(1 for _ in summarize.iter_chunks(summarize.iter_sentences(
+            summarize.iter_text_blocks(io.StringIO(text))))), 5)
+
+    stub = StubSummarizer()
+    docs = [synthetic_text(rng.randint(2_000, 12_000), rng) for _ in range(40)]
+    # One sample = the whole document set; single sub-millisecond calls are too noisy to gate on.
+    t = _best_time(lambda: [summarize.summarize_text(stub, d) for d in docs for _ in range(5)], 7)
+    results["summarize_e2e_ms"] = t / (len(docs) * 5) * 1000
+
+
+def bench_translate(results: Dict[str, Optional[float]], rng: random.Random) -> None:
+    import translate
+
+    text = synthetic_text(1_000_000, rng)
+    mb = len(text.encode("utf-8")) / 1e6
+    results["translate_chunk_mb_s"] = mb / _best_time(lambda: translate.Translator._split_into_chunks(text), 5)
+    if _installed("torch") and _installed("transformers"):
+        bench_translate_many(results, rng)
+
+
+class StubM2MTokenizer:
+    """M2M100Tokenizer stand-in: bytes -> ids, no vocabulary files needed."""
+
+    LANGS = ("en", "hi", "ta", "te")
+
+    def __init__(self):
+        self.src_lang = "en"
+
+    def __call__(self, text: str, return_tensors: str = "pt"):
+        import torch
+
+        ids = [0] + [4 + b % 200 for b in text.encode("utf-8")[:400]] + [2]
+        return {"input_ids": torch.tensor([ids]), "attention_mask": torch.ones(1, len(ids), dtype=torch.long)}
+
+    def get_lang_id(self, lang: str) -> int:
+        return 220 + self.LANGS.index(lang)
+
+    def batch_decode(self, gen, skip_special_tokens: bool = True) -> List[str]:
+        return [" ".join(str(int(t)) for t in row if int(t) > 3) for row in gen]
+
+
+def bench_translate_many(results: Dict[str, Optional[float]], rng: random.Random) -> None:
+    import torch
+    import translate
+    from transformers import M2M100Config
+
+    torch.manual_seed(SEED)
+    config = M2M100Config(vocab_size=256, d_model=64, encoder_layers=2, decoder_layers=2,
+                          encoder_attention_heads=4, decoder_attention_heads=4,
+                          encoder_ffn_dim=128, decoder_ffn_dim=128, max_position_embeddings=1024,
+                          pad_token_id=1, bos_token_id=0, eos_token_id=2, decoder_start_token_id=2)
+    tr = translate.Translator.__new__(translate.Translator)  # skip the pretrained download
+    tr.model = translate.M2M100ForConditionalGeneration(config).eval()
+    tr.tokenizer = StubM2MTokenizer()
+    text = synthetic_text(1_500, rng)
+    results["translate_many_ms"] = _best_time(
+        lambda: tr.translate_many(text, source_lang="en", target_langs=["hi", "ta", "te"]), 3) * 1000
+
+
+def _batch_stub_init(opts: dict) -> StubSummarizer:
+    return StubSummarizer()
+
+
+def _batch_stub_work(stub: StubSummarizer, text: str, opts: dict) -> Dict[str, str]:
+    return {"summary": stub(text)[0]["summary_text"]}
+
+
+def bench_batch(results: Dict[str, Optional[float]], rng: random.Random) -> None:
+    import batch_cli
+
+    n = 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "verses.jsonl")
+        with open(src, "w", encoding="utf-8") as f:
+            for i in range(n):
+                rec = {"Book_id": 1 + i // 400, "Chapter_id": 1 + i // 40 % 10, "Verse_id": 1 + i % 40,
+                       "text": " ".join(synthetic_sentences(3, rng))}
+                f.write(json.dumps(rec) + "\n")
+        sink = os.path.join(tmp, "out.jsonl")
+        t = _best_time(lambda: batch_cli.run_batch([src], _batch_stub_init, _batch_stub_work, {"torch_threads": 0},
+                                                     workers=1, sink=sink, suffix="summary", report_every=1e9), 3)
+    results["batch_items_per_s"] = n / t
+
+
+def bench_chatbot(results: Dict[str, Optional[float]], rng: random.Random) -> None:
+    import chatbot
+
+    class StubRephraser(chatbot.Rephraser):
+        def _load_pipe(self):
+            return _stub_text2text
+
+    class StubTranslator(chatbot.Translator):
+        def __init__(self):
+            self.cache_installed = set()
+
+        def translate(self, text: str, src_lang: str, tgt_lang: str) -> str:
+            return text if tgt_lang == "en" else f"[{tgt_lang}] {text}"
+
+    retriever = chatbot.ParagraphRetriever(chatbot.MAHA_MASTER_EN)
+    verses = {}
+    for b in range(1, 4):
+        for c in range(1, 21):
+            for v in range(1, 41):
+                verses[(b, c, v)] = " ".join(synthetic_sentences(2, rng))
+    retriever.update(upserts=verses)
+    sentences = retriever.sentences  # build the flattened view outside the timed region
+
+    n = len(QUERIES) * 25
+    t = _best_time(lambda: [retriever.retrieve(q) for q in QUERIES * 25])
+    results["retrieval_ns_per_query"] = t / n * 1e9
+    t = _best_time(lambda: [retriever.retrieve(q, scope=(2, 7, 20)) for q in QUERIES * 25])
+    results["scoped_retrieval_ns"] = t / n * 1e9
+    del sentences
+
+    bot = chatbot.MahabharataChatbot(rephraser=StubRephraser(), translator=StubTranslator())
+    lat = []
+    for i in range(300):
+        q = E2E_QUERIES[i % len(E2E_QUERIES)]
+        lang = ("en", "hi", "ta")[i % 3]
+        bot.answers = chatbot.AnswerCache()  # measure the uncached path
+        t0 = time.perf_counter()
+        bot.ask(q, lang)
+        lat.append((time.perf_counter() - t0) * 1000)
+    results["chatbot_e2e_p95_ms"] = _p95(lat)
+
+
+def bench_import(script: str, repeats: int = 3) -> float:
+    env = dict(os.environ, PYTHONHASHSEED="0", PYTHONDONTWRITEBYTECODE="1")
+    code = (f"import sys, time; sys.path.insert(0, {HERE!r}); import perf_gate; perf_gate.install_stubs(); "
+            f"t=time.perf_counter(); import {script}; print(time.perf_counter()-t)")
+    times = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=HERE)
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "import failed")
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(times) * 1000
+
+
+def run_suite() -> dict:
+    results: Dict[str, Optional[float]] = {m: None for m in METRICS}
+    skipped: Dict[str, str] = {}
+    stubbed = install_stubs()
+    cal = calibrate()
+    if stubbed:
+        print(f"[perf] using stand-ins for: {', '.join(stubbed)}", flush=True)
+    if "torch" in stubbed or "transformers" in stubbed:
+        skipped["translate_many_ms"] = "needs torch and transformers"
+    suites = (("summarize", bench_summarize), ("translate", bench_translate), ("chatbot", bench_chatbot),
+              ("batch_cli", bench_batch))
+    for script, fn in suites:
+        print(f"[perf] {script} ...", flush=True)
+        with contextlib.redirect_stdout(io.StringIO()):  # scripts log per chunk/model load
+            fn(results, random.Random(SEED))
+        if f"import_{script}_ms" not in METRICS:
+            continue
+        try:
+            results[f"import_{script}_ms"] = bench_import(script)
+        except RuntimeError as e:
+            skipped[f"import_{script}_ms"] = str(e)
+    # ru_maxrss is KiB on Linux.
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "metrics": results,
+        "calibration_s": cal,
+        "skipped": skipped,
+        "env": {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system(),
+                "stubbed": stubbed},
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+# --------------------------
+# Compare
+# --------------------------
+def rescaled(res: dict, cal: Optional[float]) -> dict:
+    """res with its timing metrics converted to calibration `cal` (as if measured on a machine
+    running at the speed res's calibration would have run at `cal`)."""
+    own = res.get("calibration_s")
+    if not own or not cal:
+        return res
+    f = cal / own
+    metrics = {}
+    for name, val in res["metrics"].items():
+        if val is None or name in UNTIMED or name not in METRICS:
+            metrics[name] = val
+        else:
+            metrics[name] = val * f if METRICS[name] == "lower" else val / f
+    return {**res, "metrics": metrics, "calibration_s": cal}
+
+
+def merge_best(a: dict, b: dict) -> dict:
+    """Per-metric best of two runs (b rescaled to a's calibration)."""
+    b = rescaled(b, a.get("calibration_s"))
+    metrics = dict(a["metrics"])
+    for name, direction in METRICS.items():
+        x, y = a["metrics"].get(name), b["metrics"].get(name)
+        if x is None or y is None:
+            metrics[name] = x if y is None else y
+        else:
+            metrics[name] = min(x, y) if direction == "lower" else max(x, y)
+    return {**a, "metrics": metrics}
+
+
+def compare(baseline: dict, current: dict, threshold: float, per_metric: Dict[str, float]) -> List[str]:
+    """Return a list of regression messages (empty = pass). Prints a table as a side effect."""
+    failures = []
+    current = rescaled(current, baseline.get("calibration_s"))
+    print(f"{'metric':26s} {'baseline':>12s} {'current':>12s} {'change':>9s}  limit")
+    for name, direction in METRICS.items():
+        base, cur = baseline["metrics"].get(name), current["metrics"].get(name)
+        limit = per_metric.get(name, threshold)
+        if base is None or base == 0:
+            print(f"{name:26s} {'-':>12s} {'-':>12s} {'skipped':>9s}")
+            continue
+        if cur is None:
+            # Measured before, not now: a dependency or benchmark went missing; don't pass silently.
+            reason = current.get("skipped", {}).get(name, "not measured")
+            print(f"{name:26s} {base:12.3f} {'-':>12s} {'MISSING':>9s}  ({reason})")
+            failures.append(f"{name}: in the baseline but missing from this run ({reason})")
+            continue
+        # Positive change = worse, regardless of direction.
+        change = (cur - base) / base if direction == "lower" else (base - cur) / base
+        worse_by = abs(cur - base) if change > 0 else 0.0
+        flag = "  REGRESSION" if change > limit and worse_by > ABS_FLOOR.get(name, 0.0) else ""
+        print(f"{name:26s} {base:12.3f} {cur:12.3f} {change:+8.1%}  {limit:.0%}{flag}")
+        if flag:
+            failures.append(f"{name}: {base:.3f} -> {cur:.3f} ({change:+.1%} worse, limit {limit:.0%})")
+    return failures
+
+
+def _load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save(path: str, data: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    print(f"[perf] wrote {path}")
+
+
+def _parse_metric_thresholds(items: List[str]) -> Dict[str, float]:
+    out = {}
+    for item in items:
+        name, _, val = item.partition("=")
+        if name not in METRICS or not val:
+            raise SystemExit(f"[!] bad --metric-threshold {item!r} (expected NAME=FRACTION, NAME in {', '.join(METRICS)})")
+        out[name] = float(val)
+    return out
+
+
+# --------------------------
+# Entrypoint
+# --------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite and regression gate for the AI-Models scripts.")
+    parser.add_argument("command", choices=["run", "baseline", "compare"])
+    parser.add_argument("--out", type=str, help="Where to write results (run)")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="Baseline results file")
+    parser.add_argument("--current", type=str, help="Compare this stored run instead of running the suite")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative regression per metric (0.15 = 15%%)")
+    parser.add_argument("--metric-threshold", action="append", default=[], metavar="NAME=FRACTION",
+                        help="Override the threshold for one metric (repeatable)")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="compare: re-run the suite up to this many times while something regresses")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        res = run_suite()
+        if args.out:
+            _save(args.out, res)
+        else:
+            print(json.dumps(res, indent=2, sort_keys=True))
+    elif args.command == "baseline":
+        _save(args.baseline, run_suite())
+    else:
+        if not os.path.exists(args.baseline):
+            print(f"[!] No baseline at {args.baseline}; create one with: python perf_gate.py baseline", file=sys.stderr)
+            sys.exit(2)
+        per_metric = _parse_metric_thresholds(args.metric_threshold)
+        baseline = _load(args.baseline)
+        current = _load(args.current) if args.current else run_suite()
+        failures = compare(baseline, current, args.threshold, per_metric)
+        for attempt in range(0 if args.current else args.retries):
+            if not failures:
+                break
+            print(f"\n[perf] {len(failures)} metric(s) regressed; re-measuring ({attempt + 1}/{args.retries}) ...")
+            current = merge_best(current, run_suite())
+            failures = compare(baseline, current, args.threshold, per_metric)
+        if failures:
+            print("\n[perf] FAIL:\n  " + "\n  ".join(failures))
+            sys.exit(1)
+        print("\n[perf] OK: no metric regressed past its threshold.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+request_deadline.py
+-------------------
+Per-request deadlines and cancellation for the long-running generation endpoints
+(summarize.py /summarize, translate.py /translate and /translate/many).
+
+- A Deadline comes from the X-Deadline-Ms header or a `deadline_ms` body field (milliseconds
+  from arrival), capped by the server default --request-timeout-ms.
+- It is checked between chunks and, through a generation stopping criterion, after every
+  decoding step, so an expired request stops within one step instead of finishing its text.
+- run_cancellable() also polls the connection: a client that disconnects cancels its request.
+- RequestStats counts completed / cancelled / timed-out requests for GET /metrics.
+"""
+
+from __future__ import annotations
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+DEADLINE_HEADER = "X-Deadline-Ms"
+
+# Status codes sent for stopped requests (499 is the de-facto "client closed request").
+STATUS_TIMEOUT = 504
+STATUS_CANCELLED = 499
+
+
+class RequestCancelled(Exception):
+    """Raised when a request's deadline passes or its client goes away."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"request {reason.replace('_', ' ')}")
+        self.reason = reason  # "timed_out" | "cancelled"
+
+
+class Deadline:
+    def __init__(self, timeout_s: Optional[float] = None):
+        """timeout_s=None -> no deadline; the request can still be cancelled explicitly."""
+        self.expires_at = time.monotonic() + timeout_s if timeout_s is not None else None
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def reason(self) -> Optional[str]:
+        if self._cancelled.is_set():
+            return "cancelled"
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            return "timed_out"
+        return None
+
+    def check(self) -> None:
+        reason = self.reason()
+        if reason:
+            raise RequestCancelled(reason)
+
+    def stopping_criteria(self):
+        """A StoppingCriteriaList for generate()/pipelines that ends decoding once the request is
+        stopped. The truncated output is discarded: callers must check() after generating."""
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList
+
+        deadline = self
+
+        class _DeadlineCriteria(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                stop = deadline.reason() is not None
+                return torch.full((input_ids.shape[0],), stop, dtype=torch.bool, device=input_ids.device)
+
+        return StoppingCriteriaList([_DeadlineCriteria()])
+
+
+def deadline_from(header_ms: Optional[str], body_ms: Optional[float], default_ms: float = 0.0) -> Deadline:
+    """Tightest of the header, body and server default budgets (each in ms; missing/<=0 = none)."""
+    budgets = [default_ms, body_ms]
+    try:
+        budgets.append(float(header_ms) if header_ms else None)
+    except ValueError:
+        pass
+    budgets = [b for b in budgets if b is not None and b > 0]
+    return Deadline(min(budgets) / 1000.0 if budgets else None)
+
+
+class RequestStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {"completed": 0, "cancelled": 0, "timed_out": 0}
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+async def run_cancellable(request, deadline: Deadline, fn: Callable[..., Any], *args,
+                          poll_s: float = 0.25, **kwargs) -> Any:
+    """Run blocking fn in the threadpool while watching the connection; a disconnect cancels
+    the deadline so fn's next check (between chunks or decoding steps) stops it."""
+    from starlette.concurrency import run_in_threadpool
+
+    async def watch() -> None:
+        while deadline.reason() is None:
+            if await request.is_disconnected():
+                deadline.cancel()
+                return
+            await asyncio.sleep(poll_s)
+
+    watcher = asyncio.create_task(watch())
+    try:
+        return await run_in_threadpool(fn, *args, **kwargs)
+    finally:
+        watcher.cancel()
+
+
+def add_deadline_args(p) -> None:
+    p.add_argument("--request-timeout-ms", type=float, default=0.0,
+                   help=f"Stop requests running longer than this (0 = no limit); clients may ask for less via {DEADLINE_HEADER}.")
@@ -17,6 +17,8 @@ CLI Usage:
     python summarize.py --text "Some long paragraph..."
     python summarize.py --file input.txt
     echo "text" | python summarize.py
+    python summarize.py --stream --file parva.txt --output partials.txt
+    python summarize.py --batch "parvas/*.txt" verses.jsonl --workers 2 --torch-threads 2
 
 API Usage:
     python summarize.py --serve --host 0.0.0.0 --port 8001
@@ -30,11 +32,17 @@ import subprocess
 import importlib
 import argparse
 import re
-from typing import List
+import hashlib
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, TextIO
 
 # Optional for API mode
 try:
-    from fastapi import FastAPI
+    from fastapi import FastAPI, Header, Request
+    from fastapi.responses import JSONResponse
     from pydantic import BaseModel
     import uvicorn
     FASTAPI_AVAILABLE = True
@@ -66,26 +74,238 @@ def ensure_deps():
 # ---------------------------
 # Simple sentence-aware chunking
 # ---------------------------
+SENTENCE_END_RE = re.compile(r'(?<=[\.\!\?।])\s+')
+
+def iter_text_blocks(f, block_chars: int = 64 * 1024) -> Iterator[str]:
+    """Read a text stream incrementally in fixed-size blocks."""
+    while True:
+        block = f.read(block_chars)
+        if not block:
+            return
+        yield block
+
+def iter_sentences(blocks: Iterable[str], max_pending: int = 16 * 2500) -> Iterator[str]:
+    """
+    Yield sentences from a stream of text blocks. Only the trailing, possibly incomplete
+    sentence is carried over between blocks; if it grows past max_pending chars without
+    a sentence boundary, it is emitted as-is so memory stays bounded.
+    """
+    pending = ""
+    for block in blocks:
+        pending = (pending + block).lstrip()
+        parts = SENTENCE_END_RE.split(pending)
+        pending = parts.pop()
+        for sent in parts:
+            yield sent
+        if len(pending) > max_pending:
+            yield pending
+            pending = ""
+    pending = pending.strip()
+    if pending:
+        yield pending
+
+def _is_cut_point(sentence: str, chunk_len: int, max_chars: int) -> bool:
+    """
+    Content-defined chunk boundary: whether to end a chunk after this sentence depends only on
+    the sentence itself (a hash), not on where the chunk started. Editing one sentence then
+    moves at most the boundaries up to the next cut point, so later chunks keep their exact
+    text and stay cache hits. No cut before 70% of max_chars; after that each sentence cuts
+    with probability len/(max_chars/6), so chunks average ~85% of max_chars (about 15% more
+    BART passes than greedy packing, ~1.5 chunks re-summarized per edited sentence).
+    """
+    if chunk_len < max_chars * 7 // 10:
+        return False
+    h = int.from_bytes(hashlib.blake2b(sentence.encode("utf-8"), digest_size=4).digest(), "big")
+    return h / 2**32 < len(sentence) / (max_chars // 6)
+
+def iter_chunks(sentences: Iterable[str], max_chars: int = 2500) -> Iterator[str]:
+    """Pack sentences into chunks under max_chars as they arrive, cutting at content-defined points."""
+    buf = ""
+    for s in sentences:
+        if buf and len(buf) + len(s) + 1 > max_chars:
+            yield buf
+            buf = ""
+        buf = (buf + " " + s).strip()
+        if _is_cut_point(s, len(buf), max_chars):
+            yield buf
+            buf = ""
+    if buf:
+        yield buf
+
 def split_into_chunks(text: str, max_chars: int = 2500) -> List[str]:
     """
-    Split text into roughly sentence-sized chunks under max_chars.
+    Split text into sentence-aligned chunks under max_chars (see iter_chunks).
     This keeps inputs safe for BART (which has a token limit ~1024).
     """
     text = text.strip()
     if not text:
         return []
-    sentences = re.split(r'(?<=[\.\!\?।])\s+', text)
-    chunks, buf = [], ""
-    for s in sentences:
-        if len(buf) + len(s) + 1 <= max_chars:
-            buf = (buf + " " + s).strip()
-        else:
-            if buf:
-                chunks.append(buf)
-            buf = s
-    if buf:
-        chunks.append(buf)
-    return chunks
+    sentences = SENTENCE_END_RE.split(text)
+    if len(text) <= max_chars:
+        return [" ".join(sentences)]  # fits in one pass: no cut points, no refine pass
+    return list(iter_chunks(sentences, max_chars=max_chars))
+
+# ---------------------------
+# Summary cache (memory LRU + disk)
+# ---------------------------
+MODEL_ID = "facebook/bart-large-cnn"
+
+def summarizer_version() -> str:
+    """repo@commit of the summarizer the loader will use: the commit `model_store.py preload`
+    locked, else the pinned revision. Cache keys include it, so a model update or re-pin never
+    serves summaries written by the previous weights."""
+    from model_store import MODEL_PINS, load_lock
+
+    pin = MODEL_PINS["summarizer"]
+    entry = load_lock().get("summarizer") or {}
+    return f"{pin['repo_id']}@{entry.get('commit') or pin['revision']}"
+
+class SummaryCache:
+    """
+    Two-tier cache for summaries keyed by (sha256(text), min_length, max_length, model version).
+    - Memory tier: LRU bounded by the total byte size of the cached summaries.
+    - Disk tier (optional): one small JSON file per key under cache_dir, survives restarts.
+      Bounded by disk_max_bytes (0 = unbounded); once over, the least recently used files
+      (by mtime, refreshed on every disk hit) are removed down to 90% of the cap.
+    Chunk partials and the refinement pass are cached with the same keys, so editing one
+    verse in a long passage only re-summarizes the chunks that actually changed.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 64 * 1024 * 1024,
+                 disk_max_bytes: int = 512 * 1024 * 1024, model_id: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.model_id = model_id or summarizer_version()
+        self._mem: "OrderedDict[str, str]" = OrderedDict()
+        self._mem_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def make_key(self, text: str, min_len: int, max_len: int) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{digest}|{min_len}|{max_len}|{self.model_id}".encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _disk_entries(self) -> List[tuple]:
+        """(mtime, size, path) of every cache file on disk."""
+        entries = []
+        for sub in os.scandir(self.cache_dir):
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub.path):
+                if e.name.endswith(".json"):
+                    try:
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, e.path))
+        return entries
+
+    def _trim_disk(self) -> None:
+        # Rescanning is O(entries) but only runs once the cap is crossed, and trimming to 90%
+        # leaves room for many more writes before the next scan. Other processes sharing the
+        # directory are accounted for by the rescan.
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_max_bytes * 9 // 10
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.disk_evictions += 1
+        self._disk_bytes = total
+
+    def _put_mem(self, key: str, value: str) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= len(old.encode("utf-8"))
+        self._mem[key] = value
+        self._mem_bytes += size
+        while self._mem_bytes > self.max_bytes and self._mem:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= len(evicted.encode("utf-8"))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return self._mem[key]
+        if self.cache_dir:
+            try:
+                path = self._disk_path(key)
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)["summary"]
+                try:
+                    os.utime(path)  # recency for disk eviction
+                except OSError:
+                    pass
+                with self._lock:
+                    self._put_mem(key, value)
+                    self.hits += 1
+                return value
+            except (OSError, ValueError, KeyError):
+                pass
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._put_mem(key, value)
+        if not self.cache_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial entry.
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"summary": value}, f, ensure_ascii=False)
+            size = os.path.getsize(tmp)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[warn] Could not write summary cache entry: {e}", file=sys.stderr)
+            return
+        with self._lock:
+            self._disk_bytes += size
+            if self.disk_max_bytes and self._disk_bytes > self.disk_max_bytes:
+                self._trim_disk()
+
+def _cached_summary(summarizer, text: str, min_len: int, max_len: int,
+                    cache: Optional[SummaryCache], deadline=None) -> str:
+    key = cache.make_key(text, min_len, max_len) if cache else None
+    if cache:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
+    gen_kwargs = {}
+    if deadline is not None:
+        deadline.check()
+        gen_kwargs["stopping_criteria"] = deadline.stopping_criteria()
+    out = summarizer(text, max_length=max_len, min_length=min_len, do_sample=False, **gen_kwargs)
+    if deadline is not None:
+        deadline.check()  # generation may have been cut short; never return or cache a truncated summary
+    summary = out[0]["summary_text"].strip()
+    if cache:
+        cache.put(key, summary)
+    return summary
 
 # ---------------------------
 # Main summarization logic
@@ -100,14 +320,18 @@ def build_summarizer():
     else:
         print("[info] Using CPU", flush=True)
 
-    # facebook/bart-large-cnn is ~1.6GB on first download
+    # facebook/bart-large-cnn is ~1.6GB on first download; `python model_store.py preload` fetches it ahead of time
+    from model_store import pipeline_args
+
     return pipeline(
         "summarization",
-        model="facebook/bart-large-cnn",
+        **pipeline_args("summarizer"),
         device=device
     )
 
-def summarize_text(summarizer, text: str, min_len: int = 50, max_len: int = 120) -> str:
+def summarize_text(summarizer, text: str, min_len: int = 50, max_len: int = 120,
+                   cache: Optional[SummaryCache] = None, deadline=None) -> str:
+    # deadline: optional request_deadline.Deadline, checked before each chunk and during generation.
     # If very long, summarize in chunks and then (optionally) summarize the concatenation.
     chunks = split_into_chunks(text, max_chars=2500)
     if not chunks:
@@ -116,24 +340,59 @@ def summarize_text(summarizer, text: str, min_len: int = 50, max_len: int = 120)
     partials = []
     for i, ch in enumerate(chunks, 1):
         print(f"[run] Summarizing chunk {i}/{len(chunks)}...", flush=True)
-        out = summarizer(ch, max_length=max_len, min_length=min_len, do_sample=False)
-        partials.append(out[0]["summary_text"].strip())
+        partials.append(_cached_summary(summarizer, ch, min_len, max_len, cache, deadline))
 
     combined = " ".join(partials).strip()
 
     # If we had to chunk and produced many partials, do a short final pass to tighten.
     if len(partials) > 1:
         print("[run] Refining combined summary...", flush=True)
-        refined = summarizer(
-            combined,
-            max_length=max_len,
-            min_length=min_len,
-            do_sample=False
-        )[0]["summary_text"].strip()
-        return refined
+        return _cached_summary(summarizer, combined, min_len, max_len, cache, deadline)
 
     return combined
 
+def summarize_stream(summarizer, chunks: Iterable[str], min_len: int = 50, max_len: int = 120,
+                     cache: Optional[SummaryCache] = None, sink: Optional[TextIO] = None,
+                     max_chars: int = 2500) -> str:
+    """
+    Map-reduce summarization over a chunk generator in bounded memory.
+    Each chunk is summarized as it arrives (and written to sink, if given). Partials are
+    reduced level by level: once a level holds ~max_chars of summaries it is summarized
+    into one entry of the next level, so only O(log n) short summaries are ever held.
+    """
+    levels: List[List[str]] = []
+
+    def push(level: int, summary: str) -> None:
+        while True:
+            if len(levels) <= level:
+                levels.append([])
+            levels[level].append(summary)
+            if sum(len(x) + 1 for x in levels[level]) < max_chars:
+                return
+            print(f"[run] Reducing level {level} ({len(levels[level])} summaries)...", flush=True)
+            combined = " ".join(levels[level]).strip()
+            levels[level] = []
+            summary = _cached_summary(summarizer, combined, min_len, max_len, cache)
+            level += 1
+
+    n = 0
+    for n, ch in enumerate(chunks, 1):
+        print(f"[run] Summarizing chunk {n}...", flush=True)
+        part = _cached_summary(summarizer, ch, min_len, max_len, cache)
+        if sink is not None:
+            sink.write(part + "\n")
+            sink.flush()
+        push(0, part)
+
+    # Higher levels cover earlier text, so read them first.
+    remaining = [x for lvl in reversed(levels) for x in lvl]
+    if not remaining:
+        return ""
+    if len(remaining) == 1 and n == 1:
+        return remaining[0]
+    print("[run] Refining combined summary...", flush=True)
+    return _cached_summary(summarizer, " ".join(remaining).strip(), min_len, max_len, cache)
+
 # ---------------------------
 # CLI / I/O helpers
 # ---------------------------
@@ -158,6 +417,10 @@ def read_stdin_if_piped() -> str:
     return ""
 
 def parse_args():
+    from batch_cli import add_batch_args
+    from model_lifecycle import add_lifecycle_args
+    from request_deadline import add_deadline_args
+
     p = argparse.ArgumentParser(description="Summarize text with BART (facebook/bart-large-cnn).")
     p.add_argument("--text", type=str, help="Raw text to summarize.")
     p.add_argument("--file", type=str, help="Path to a UTF-8 text file to summarize.")
@@ -166,8 +429,56 @@ def parse_args():
     p.add_argument("--serve", action="store_true", help="Run as HTTP API instead of CLI")
     p.add_argument("--host", type=str, default="127.0.0.1", help="API host")
     p.add_argument("--port", type=int, default=8001, help="API port")
+    p.add_argument("--offline", action="store_true", help="Only load preloaded models (see model_store.py); never download.")
+    p.add_argument("--stream", action="store_true",
+                   help="Read --file/stdin incrementally and summarize chunks as they arrive (bounded memory).")
+    p.add_argument("--output", type=str, help="With --stream, write each partial summary to this file (overwritten) as it is produced.")
+    p.add_argument("--cache-dir", type=str, default=os.environ.get("SUMMARY_CACHE_DIR"),
+                   help="Directory for the persistent summary cache (disabled if unset).")
+    p.add_argument("--cache-mb", type=int, default=64, help="In-memory summary cache size (MB).")
+    p.add_argument("--cache-disk-mb", type=int, default=512,
+                   help="Size cap for --cache-dir (MB, 0 = unbounded); least recently used entries are removed first.")
+    add_batch_args(p, default_suffix="summary")
+    add_lifecycle_args(p)
+    add_deadline_args(p)
     return p.parse_args()
 
+def open_input_stream(args) -> Optional[TextIO]:
+    """Stream source for --stream: --file or piped stdin (None falls back to get_input_text)."""
+    if args.file:
+        if not os.path.exists(args.file):
+            print(f"[error] File not found: {args.file}", file=sys.stderr)
+            sys.exit(1)
+        return open(args.file, "r", encoding="utf-8")
+    if not args.text and not sys.stdin.isatty():
+        return sys.stdin
+    return None
+
+def run_stream(summarizer, args, cache: Optional[SummaryCache]) -> None:
+    src = open_input_stream(args)
+    if src is None:
+        blocks: Iterable[str] = [get_input_text(args)]
+    else:
+        blocks = iter_text_blocks(src)
+    sink = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        summary = summarize_stream(
+            summarizer,
+            iter_chunks(iter_sentences(blocks)),
+            min_len=args.min_length,
+            max_len=args.max_length,
+            cache=cache,
+            sink=sink
+        )
+    finally:
+        if sink is not None:
+            sink.close()
+        if src is not None and src is not sys.stdin:
+            src.close()
+    print("\n=== Summarized Version ===")
+    print(summary)
+    print("\n[done]")
+
 def get_input_text(args) -> str:
     # Priority: --text > --file > stdin > default text
     if args.text:
@@ -186,27 +497,39 @@ def get_input_text(args) -> str:
 # ---------------------------
 # API mode (for frontend)
 # ---------------------------
-def run_api(host: str, port: int):
+def run_api(host: str, port: int, cache: Optional[SummaryCache] = None, models=None,
+            request_timeout_ms: float = 0.0):
     """
     Start a FastAPI server exposing /summarize.
     POST /summarize
     {
       "text": "string",
       "min_length": 50,
-      "max_length": 120
+      "max_length": 120,
+      "deadline_ms": 10000        (optional; or header X-Deadline-Ms)
     }
+    Requests past their deadline (504) or whose client disconnected (499) stop summarizing.
     """
     if not FASTAPI_AVAILABLE:
         print("[!] fastapi/uvicorn not installed. Run:\n    pip install fastapi uvicorn pydantic\n")
         sys.exit(1)
 
-    summarizer = build_summarizer()
+    from model_lifecycle import ModelManager
+    from request_deadline import (RequestCancelled, RequestStats, STATUS_CANCELLED, STATUS_TIMEOUT,
+                                  deadline_from, run_cancellable)
+
+    # BART is loaded through the lifecycle manager so it can be unloaded when idle/over budget.
+    models = models or ModelManager()
+    models.register("summarizer", build_summarizer)
+    models.get("summarizer")  # warm start
+    stats = RequestStats()
     app = FastAPI(title="Text Summarizer API", version="1.0.0", description="Summarize text using BART CNN model")
 
     class SummarizeIn(BaseModel):
         text: str
         min_length: int = 50
         max_length: int = 120
+        deadline_ms: Optional[float] = None
 
     class SummarizeOut(BaseModel):
         summary: str
@@ -216,14 +539,24 @@ def run_api(host: str, port: int):
         max_length: int
 
     @app.post("/summarize", response_model=SummarizeOut)
-    def summarize_endpoint(payload: SummarizeIn):
+    async def summarize_endpoint(payload: SummarizeIn, request: Request,
+                                 x_deadline_ms: Optional[str] = Header(None)):
+        deadline = deadline_from(x_deadline_ms, payload.deadline_ms, request_timeout_ms)
+
+        def work() -> str:
+            with models.use("summarizer") as summarizer:
+                return summarize_text(
+                    summarizer,
+                    payload.text,
+                    min_len=payload.min_length,
+                    max_len=payload.max_length,
+                    cache=cache,
+                    deadline=deadline
+                )
+
         try:
-            summary = summarize_text(
-                summarizer,
-                payload.text,
-                min_len=payload.min_length,
-                max_len=payload.max_length
-            )
+            summary = await run_cancellable(request, deadline, work)
+            stats.record("completed")
             return SummarizeOut(
                 summary=summary,
                 original_length=len(payload.text),
@@ -231,6 +564,11 @@ def run_api(host: str, port: int):
                 min_length=payload.min_length,
                 max_length=payload.max_length
             )
+        except RequestCancelled as e:
+            stats.record(e.reason)
+            print(f"[i] /summarize stopped: {e}", flush=True)
+            status = STATUS_TIMEOUT if e.reason == "timed_out" else STATUS_CANCELLED
+            return JSONResponse(status_code=status, content={"detail": str(e)})
         except Exception as e:
             return SummarizeOut(
                 summary=f"Error: {str(e)}",
@@ -240,22 +578,70 @@ def run_api(host: str, port: int):
                 max_length=payload.max_length
             )
 
-    print(f"[i] API running at http://{host}:{port}  (POST /summarize)")
+    @app.get("/metrics")
+    def metrics():
+        out = {"models": models.metrics(), "requests": stats.snapshot()}
+        if cache is not None:
+            out["summary_cache"] = {"hits": cache.hits, "misses": cache.misses, "memory_bytes": cache._mem_bytes,
+                                    "disk_bytes": cache._disk_bytes, "disk_evictions": cache.disk_evictions}
+        return out
+
+    print(f"[i] API running at http://{host}:{port}  (POST /summarize, GET /metrics)")
     uvicorn.run(app, host=host, port=port)
 
+# ---------------------------
+# Batch mode (offline corpus)
+# ---------------------------
+def _batch_init(opts: dict):
+    cache = SummaryCache(opts["cache_dir"], max_bytes=opts["cache_mb"] * 1024 * 1024,
+                         disk_max_bytes=opts["cache_disk_mb"] * 1024 * 1024)
+    return build_summarizer(), cache
+
+def _batch_work(state, text: str, opts: dict) -> dict:
+    summarizer, cache = state
+    return {"summary": summarize_text(summarizer, text, min_len=opts["min_length"],
+                                      max_len=opts["max_length"], cache=cache)}
+
+def run_batch_cli(args) -> None:
+    from batch_cli import run_batch
+
+    opts = {"min_length": args.min_length, "max_length": args.max_length, "cache_dir": args.cache_dir,
+            "cache_mb": args.cache_mb, "cache_disk_mb": args.cache_disk_mb, "torch_threads": args.torch_threads}
+    failed = run_batch(args.batch, _batch_init, _batch_work, opts,
+                       workers=args.workers, sink=args.sink, suffix=args.suffix)
+    sys.exit(1 if failed else 0)
+
 # ---------------------------
 # Entrypoint
 # ---------------------------
 def main():
     ensure_deps()
     args = parse_args()
+    if args.offline:
+        from model_store import set_offline
+        set_offline(True)
+    if args.batch:
+        run_batch_cli(args)
+        return
+    cache = SummaryCache(args.cache_dir, max_bytes=args.cache_mb * 1024 * 1024,
+                         disk_max_bytes=args.cache_disk_mb * 1024 * 1024)
 
     if args.serve:
-        run_api(args.host, args.port)
+        from model_lifecycle import manager_from_args
+        run_api(args.host, args.port, cache=cache, models=manager_from_args(args),
+                request_timeout_ms=args.request_timeout_ms)
         return
 
     # Re-import after potential install
     summarizer = build_summarizer()
+    if args.stream:
+        try:
+            run_stream(summarizer, args, cache)
+        except Exception as e:
+            print(f"[error] Summarization failed: {e}", file=sys.stderr)
+            sys.exit(2)
+        return
+
     text = get_input_text(args)
 
     print("\n=== Original Text (truncated preview) ===")
@@ -268,7 +654,8 @@ def main():
             summarizer,
             text,
             min_len=args.min_length,
-            max_len=args.max_length
+            max_len=args.max_length,
+            cache=cache
         )
     except Exception as e:
         print(f"[error] Summarization failed: {e}", file=sys.stderr)
@@ -0,0 +1,13 @@
+"""Shared test setup: import the scripts from AI-Models/ and give them perf_gate's empty
+stand-ins for torch/transformers/argostranslate when those aren't installed, so the tests
+cover the code around the models on any CPU-only box."""
+
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import perf_gate  # noqa: E402
+
+perf_gate.install_stubs()
@@ -0,0 +1,108 @@
+import pytest
+
+import chatbot
+
+
+# (question, should pass the Mahabharata gate). Native-script names must match as whole words:
+# common words that merely contain a name's letters are refused.
+GATE_CASES = [
+    ("مجھے مدد کرنے کا طریقہ بتائیں", False),   # Urdu: "tell me how to help" (karna = to do)
+    ("ਮੈਨੂੰ ਕੰਮ ਕਰਨ ਵਿੱਚ ਮਦਦ ਕਰੋ", False),      # Punjabi: "help me do the work"
+    ("کورونا وائرس کیا ہے؟", False),            # Urdu: "what is coronavirus"
+    ("Как купить дрон?", False),                # Russian: "how to buy a drone"
+    ("Как играть на гитаре?", False),           # Russian: "how to play guitar"
+    ("Что такое карнавал?", False),             # Russian: "what is a carnival"
+    ("达摩是什么", False),                        # Chinese: Bodhidharma, not dharma
+    ("攻坚战", False),                            # Chinese: "assault campaign" (not Yudhishthira)
+    ("双拳难敌四手", False),                      # Chinese idiom (not Duryodhana)
+    ("从白天到黑天", False),                      # Chinese: "from day to night" (not Krishna)
+    ("¿Quién es Kṛṣṇa?", True),                  # IAST spellings fold to krsna/bhisma
+    ("Who was Bhīṣma?", True),
+    ("कृष्ण कौन है?", True),
+    ("கிருஷ்ணன் யார்?", True),
+    ("కృష్ణుడు ఎవరు?", True),
+    ("Кто такой Карна?", True),
+    ("Расскажи о пандавах", True),
+    ("من هو كريشنا؟", True),
+    ("クリシュナは誰ですか", True),
+    ("般度族是谁", True),
+]
+
+# (question, question, should share an answer-cache key).
+NORMALIZER_CASES = [
+    ("What did Bhima do before Ekachakra?", "What did Bhima do after Ekachakra?", False),
+    ("Why did Karna fight?", "Why did Karna not fight?", False),
+    ("Tell me about Arjun", "Who is Arjuna?", False),
+    ("Tell me about Arjun", "please explain about arjuna", True),
+    ("युधिष्ठिर ने जुआ क्यों खेला?", "युधिष्ठिर का राज्याभिषेक कब हुआ?", False),
+    ("युधिष्ठिर ने जुआ क्यों खेला?", "युधिष्ठिर ने जुआ क्यों खेला", True),
+]
+
+
+@pytest.fixture(scope="module")
+def gate():
+    return chatbot.MahabharataGate()
+
+
+@pytest.mark.parametrize("question,expected", GATE_CASES)
+def test_gate(gate, question, expected):
+    assert gate.is_mahabharata(question) == expected
+
+
+@pytest.mark.parametrize("a,b,same", NORMALIZER_CASES)
+def test_normalizer_key(a, b, same):
+    norm = chatbot.QueryNormalizer()
+    assert (norm.key(a) == norm.key(b)) == same
+
+
+# --------------------------
+# Answer cache
+# --------------------------
+class _EchoRephraser(chatbot.Rephraser):
+    """Returns the retrieved context with a marker (unchanged context would read as a load-shed
+    answer, which is never cached), without loading a model."""
+
+    def __init__(self):
+        super().__init__(chatbot.DecodingPolicy())
+        self.available = True
+        self.calls = 0
+
+    def paraphrase(self, context_answer, question, gen_kwargs=None):
+        self.calls += 1
+        return "In short: " + context_answer
+
+
+class _EchoTranslator(chatbot.Translator):
+    def __init__(self):
+        self.cache_installed = set()
+
+    def translate(self, text, src_lang, tgt_lang):
+        return text
+
+
+@pytest.fixture
+def bot():
+    return chatbot.MahabharataChatbot(rephraser=_EchoRephraser(), translator=_EchoTranslator())
+
+
+def test_answer_cache_lru():
+    cache = chatbot.AnswerCache(max_entries=2)
+    cache.put(("a",), "A")
+    cache.put(("b",), "B")
+    assert cache.get(("a",)) == "A"  # a is now most recent
+    cache.put(("c",), "C")
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == "A" and cache.get(("c",)) == "C"
+
+
+def test_equivalent_questions_share_an_answer(bot):
+    first = bot._answer_en("Who was Bakasura?")
+    assert bot._answer_en("who was bakasura") == first
+    assert bot.rephraser.calls == 1 and bot.answers.hits == 1
+
+
+def test_index_update_invalidates_cached_answers(bot):
+    before = bot._answer_en("Who guarded the Zorbaxa gate?")
+    assert "Zorbaxa" not in before
+    bot.retriever.add_verse((1, 1, 1), "The Zorbaxa gate was guarded by Vidura.")
+    assert "Zorbaxa" in bot._answer_en("Who guarded the Zorbaxa gate?")
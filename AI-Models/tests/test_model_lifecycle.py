@@ -0,0 +1,112 @@
+import threading
+import time
+
+from model_lifecycle import ModelManager, estimate_bytes
+
+
+class _Tensor:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def numel(self):
+        return self.nbytes
+
+    def element_size(self):
+        return 1
+
+
+class FakeModel:
+    """Looks like a torch module to estimate_bytes(): one parameter of `nbytes` bytes."""
+
+    def __init__(self, nbytes):
+        self._params = [_Tensor(nbytes)]
+
+    def parameters(self):
+        return iter(self._params)
+
+    def buffers(self):
+        return iter(())
+
+
+def _loader(nbytes, calls, delay=0.0):
+    def load():
+        calls.append(1)
+        time.sleep(delay)
+        return FakeModel(nbytes)
+    return load
+
+
+def _loaded(m, name):
+    return m.metrics()["models"][name]["loaded"]
+
+
+def test_estimate_bytes():
+    assert estimate_bytes(FakeModel(123)) == 123
+    assert estimate_bytes(object()) == 0
+
+
+def test_concurrent_cold_requests_load_once():
+    m = ModelManager()
+    calls = []
+    m.register("a", _loader(100, calls, delay=0.2))
+    got = []
+
+    def worker():
+        with m.use("a") as obj:
+            got.append(obj)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(got) == 8 and all(obj is got[0] for obj in got)
+
+
+def test_budget_unloads_least_recently_used_idle_model():
+    m = ModelManager(budget_bytes=250)
+    calls = []
+    for name in ("a", "b", "c"):
+        m.register(name, _loader(100, calls))
+    m.get("a")
+    m.get("b")
+    m.get("a")  # b is now the least recently used
+    m.get("c")
+    assert _loaded(m, "a") and _loaded(m, "c") and not _loaded(m, "b")
+    assert m.resident_bytes() <= 250
+    assert m.metrics()["unloads_total"]["budget"] == 1
+
+
+def test_models_in_use_are_never_unloaded():
+    m = ModelManager(budget_bytes=150)
+    calls = []
+    m.register("a", _loader(100, calls))
+    m.register("b", _loader(100, calls))
+    with m.use("a"):
+        with m.use("b"):
+            assert _loaded(m, "a") and _loaded(m, "b")  # over budget rather than failing
+        # b finished while still over budget; a is busy, so b goes.
+        assert _loaded(m, "a") and not _loaded(m, "b")
+
+
+def test_model_larger_than_budget_is_unloaded_after_each_request():
+    m = ModelManager(budget_bytes=50)
+    calls = []
+    m.register("big", _loader(100, calls))
+    for _ in range(2):
+        with m.use("big") as obj:
+            assert isinstance(obj, FakeModel)
+        assert not _loaded(m, "big")
+    assert len(calls) == 2
+
+
+def test_no_budget_keeps_everything():
+    m = ModelManager()
+    calls = []
+    for name in ("a", "b"):
+        m.register(name, _loader(10**9, calls))
+        m.get(name)
+    assert _loaded(m, "a") and _loaded(m, "b")
+    assert m.unload("a") and not _loaded(m, "a")
+    assert m.metrics()["unloads_total"]["manual"] == 1
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+
+import summarize
+from request_deadline import Deadline, RequestCancelled, RequestStats, deadline_from, run_cancellable
+
+
+class _NoTorchDeadline(Deadline):
+    """Deadline whose decoding-step hook is a no-op, for stand-in summarizers without torch."""
+
+    def stopping_criteria(self):
+        return []
+
+
+def test_no_deadline_never_expires():
+    d = Deadline()
+    assert d.reason() is None
+    d.check()
+
+
+def test_expired_deadline_raises_timed_out():
+    d = Deadline(0.01)
+    time.sleep(0.02)
+    with pytest.raises(RequestCancelled) as e:
+        d.check()
+    assert e.value.reason == "timed_out"
+
+
+def test_cancel_wins_over_timeout():
+    d = Deadline(60)
+    d.cancel()
+    with pytest.raises(RequestCancelled) as e:
+        d.check()
+    assert e.value.reason == "cancelled"
+
+
+@pytest.mark.parametrize("header,body,default,expected", [
+    (None, None, 0.0, None),
+    ("500", None, 0.0, 0.5),
+    (None, 200, 1000.0, 0.2),
+    ("5000", None, 1000.0, 1.0),   # the server default caps what a client may ask for
+    ("bogus", 0, 300.0, 0.3),      # unparsable header and <=0 body are ignored
+])
+def test_deadline_from_takes_tightest_budget(header, body, default, expected):
+    d = deadline_from(header, body, default)
+    if expected is None:
+        assert d.expires_at is None
+    else:
+        assert d.expires_at - time.monotonic() == pytest.approx(expected, abs=0.05)
+
+
+def test_summarize_stops_between_chunks():
+    deadline = _NoTorchDeadline()
+    calls = []
+
+    def summarizer(text, max_length, min_length, do_sample, **kwargs):
+        calls.append(text)
+        deadline.cancel()  # client goes away during the first chunk
+        return [{"summary_text": text[:40]}]
+
+    text = " ".join(f"Sentence {i} is about the Pandavas in exile." for i in range(300))
+    cache = summarize.SummaryCache(None, model_id="test")
+    with pytest.raises(RequestCancelled):
+        summarize.summarize_text(summarizer, text, cache=cache, deadline=deadline)
+    assert len(calls) == 1
+    assert cache._mem_bytes == 0  # the interrupted summary is not cached
+
+
+def test_request_stats():
+    stats = RequestStats()
+    for outcome in ("completed", "completed", "timed_out", "cancelled"):
+        stats.record(outcome)
+    assert stats.snapshot() == {"completed": 2, "cancelled": 1, "timed_out": 1}
+
+
+def test_disconnect_cancels_running_request():
+    pytest.importorskip("starlette")
+
+    class Request:
+        async def is_disconnected(self):
+            return True
+
+    deadline = Deadline()
+
+    def work():
+        for _ in range(200):
+            deadline.check()
+            time.sleep(0.01)
+        return "finished"
+
+    with pytest.raises(RequestCancelled) as e:
+        asyncio.run(run_cancellable(Request(), deadline, work, poll_s=0.01))
+    assert e.value.reason == "cancelled"
+
+
+def test_stopping_criteria_ends_generation():
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    if getattr(torch, "__spec__", None) is None:
+        pytest.skip("torch is a perf_gate stand-in")
+    d = Deadline()
+    criteria = d.stopping_criteria()
+    ids = torch.zeros((2, 3), dtype=torch.long)
+    assert not criteria[0](ids, None).any()
+    d.cancel()
+    assert criteria[0](ids, None).all()
@@ -0,0 +1,65 @@
+import os
+
+import chatbot
+
+BASE = "Arjuna was a great archer. Bhima was very strong."
+
+
+def _verse(i):
+    return f"Verse {i} tells of sage Marutha{i} in the forest."
+
+
+def test_upsert_replace_and_delete():
+    r = chatbot.ParagraphRetriever(BASE)
+    r.add_verse((1, 1, 1), "Vidura advised the king wisely.")
+    assert "Vidura advised the king wisely." in r.sentences
+    assert "Vidura" in r.retrieve("What did Vidura advise?")
+
+    r.add_verse((1, 1, 1), "Vidura warned the king about the dice game.")
+    assert "Vidura advised the king wisely." not in r.sentences
+    assert "Vidura warned the king about the dice game." in r.sentences
+
+    r.delete_verse((1, 1, 1))
+    assert not any("Vidura" in s for s in r.sentences)
+    assert "Arjuna was a great archer." in r.sentences  # base text is untouched
+
+
+def test_update_bumps_version():
+    r = chatbot.ParagraphRetriever(BASE)
+    v = r.version
+    r.update(upserts={(1, 1, 1): "Kunti prayed."}, deletes=[(1, 1, 2)])
+    assert r.version == v + 1
+
+
+def test_merges_bound_segment_count_and_keep_contents():
+    r = chatbot.ParagraphRetriever(BASE, max_segments=4)
+    for i in range(40):
+        r.add_verse((1, 1, i), _verse(i))
+    for i in range(0, 40, 2):
+        r.delete_verse((1, 1, i))
+    assert len(r._snapshot.segments) <= r.max_segments
+    live = [s for s in r.sentences if s.startswith("Verse ")]
+    assert sorted(live) == sorted(_verse(i) for i in range(1, 40, 2))
+
+
+def test_reload_from_index_dir(tmp_path):
+    index_dir = str(tmp_path / "index")
+    r = chatbot.ParagraphRetriever(BASE, index_dir=index_dir, max_segments=4)
+    for i in range(12):
+        r.add_verse((2, 3, i), _verse(i))
+    r.delete_verse((2, 3, 5))
+    r.add_verse((2, 3, 6), "Verse 6 was rewritten.")
+
+    reloaded = chatbot.ParagraphRetriever(BASE, index_dir=index_dir, max_segments=4)
+    assert sorted(reloaded.sentences) == sorted(r.sentences)
+    assert "Marutha7" in reloaded.retrieve("Who is Marutha7?", scope=(2, 3, 7))
+
+    # Only segments named in the manifest stay on disk; superseded ones were removed.
+    on_disk = sorted(n for n in os.listdir(index_dir) if n.startswith("seg-"))
+    assert on_disk == sorted(os.path.basename(r._seg_path(s.seg_id)) for s in r._snapshot.segments[1:])
+
+    # Later updates continue from the persisted segment ids.
+    reloaded.add_verse((2, 3, 99), "A new verse about Ghatotkacha.")
+    again = chatbot.ParagraphRetriever(BASE, index_dir=index_dir)
+    assert "A new verse about Ghatotkacha." in again.sentences
+    assert "Verse 6 was rewritten." in again.sentences
@@ -0,0 +1,84 @@
+import os
+
+import summarize
+
+MODEL = "facebook/bart-large-cnn@test"
+
+
+def _cache(tmp_path=None, **kw):
+    return summarize.SummaryCache(str(tmp_path) if tmp_path else None, model_id=MODEL, **kw)
+
+
+def _disk_files(root):
+    return [os.path.join(d, n) for d, _, names in os.walk(root) for n in names if n.endswith(".json")]
+
+
+def test_key_covers_text_lengths_and_model():
+    c = _cache()
+    key = c.make_key("some text", 50, 120)
+    assert key == c.make_key("some text", 50, 120)
+    assert key != c.make_key("some text!", 50, 120)
+    assert key != c.make_key("some text", 40, 120)
+    other = summarize.SummaryCache(None, model_id="facebook/bart-large-cnn@other")
+    assert key != other.make_key("some text", 50, 120)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    c = _cache(max_bytes=30)
+    c.put("a", "x" * 10)
+    c.put("b", "y" * 10)
+    assert c.get("a") == "x" * 10  # a is now most recent
+    c.put("c", "z" * 10)
+    c.put("d", "w" * 10)  # 40 bytes > 30: evicts b
+    assert c.get("b") is None
+    assert c.get("a") is not None and c.get("d") is not None
+    c.put("huge", "h" * 100)  # larger than the whole tier: not kept
+    assert c.get("huge") is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    c = _cache(tmp_path)
+    c.put(c.make_key("t", 1, 2), "summary")
+    fresh = _cache(tmp_path)
+    assert fresh.get(fresh.make_key("t", 1, 2)) == "summary"
+    assert fresh.hits == 1
+
+
+def test_disk_tier_evicts_oldest_past_cap(tmp_path):
+    c = _cache(tmp_path, disk_max_bytes=4000)
+    keys = [c.make_key(f"text {i}", 1, 2) for i in range(30)]
+    for i, key in enumerate(keys):
+        c.put(key, "s" * 200)
+        os.utime(c._disk_path(key), (i, i))  # deterministic write order
+        if i == 5:
+            _cache(tmp_path).get(keys[0])  # a disk hit (from a fresh process) refreshes recency
+    size = sum(os.path.getsize(p) for p in _disk_files(tmp_path))
+    assert size <= 4000 and c._disk_bytes == size
+    assert c.disk_evictions > 0
+    assert os.path.exists(c._disk_path(keys[0]))  # recently read
+    assert not os.path.exists(c._disk_path(keys[1]))
+    assert os.path.exists(c._disk_path(keys[-1]))
+
+    # A new process starts from what is already on disk.
+    assert _cache(tmp_path, disk_max_bytes=4000)._disk_bytes == size
+
+
+def test_summarize_text_reuses_cached_chunks():
+    calls = []
+
+    def summarizer(text, max_length, min_length, do_sample):
+        calls.append(text)
+        return [{"summary_text": text[:40]}]
+
+    sentences = [f"Sentence number {i} describes the war at Kurukshetra in detail." for i in range(200)]
+    text = " ".join(sentences)
+    c = _cache()
+    summarize.summarize_text(summarizer, text, cache=c)
+    first = len(calls)
+    assert first > 2
+    summarize.summarize_text(summarizer, text, cache=c)
+    assert len(calls) == first  # fully cached
+
+    edited = text.replace("Sentence number 150 ", "Sentence number one-fifty ")
+    summarize.summarize_text(summarizer, edited, cache=c)
+    assert first < len(calls) <= first + 3  # the edited chunk (or two) plus the refinement pass
@@ -8,6 +8,9 @@ Local, free multilingual translation using Meta's M2M100 (facebook/m2m100_418M).
 USAGE (CLI):
   python translate.py
 
+USAGE (batch, model loaded once per worker):
+  python translate.py --batch verses/ verses.jsonl --target-langs hi,ta --workers 4 --torch-threads 2
+
 USAGE (API):
   python translate.py --serve --host 0.0.0.0 --port 8000
   curl -X POST "http://localhost:8000/translate" -H "Content-Type: application/json" \
@@ -21,7 +24,7 @@ from __future__ import annotations
 import argparse
 import re
 import sys
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 # Helpful, early check so users get a clear message if sentencepiece is missing.
 try:
@@ -40,7 +43,8 @@ from transformers import M2M100ForConditionalGeneration, M2M100Tokenizer
 
 # Optional for API mode
 try:
-    from fastapi import FastAPI
+    from fastapi import FastAPI, Header, Request
+    from fastapi.responses import JSONResponse
     from pydantic import BaseModel
     import uvicorn
     FASTAPI_AVAILABLE = True
@@ -85,8 +89,13 @@ class Translator:
 
     def __init__(self, model_id: str = MODEL_ID):
         print("[i] Loading model (first run downloads weights)...")
-        self.tokenizer = M2M100Tokenizer.from_pretrained(model_id)
-        self.model = M2M100ForConditionalGeneration.from_pretrained(model_id)
+        kwargs: dict = {}
+        if model_id == MODEL_ID:
+            # Use the pinned, preloaded copy when available (python model_store.py preload translator).
+            from model_store import model_source
+            model_id, kwargs = model_source("translator")
+        self.tokenizer = M2M100Tokenizer.from_pretrained(model_id, **kwargs)
+        self.model = M2M100ForConditionalGeneration.from_pretrained(model_id, **kwargs)
         print("[i] Model loaded.")
 
     @staticmethod
@@ -110,10 +119,18 @@ class Translator:
             chunks.append(cur)
         return chunks
 
-    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+    @staticmethod
+    def _stop_kwargs(deadline) -> dict:
+        if deadline is None:
+            return {}
+        deadline.check()
+        return {"stopping_criteria": deadline.stopping_criteria()}
+
+    def translate(self, text: str, source_lang: str, target_lang: str, deadline=None) -> str:
         """
         Translate text from source_lang to target_lang using M2M100.
         Handles long text via chunking and recombines results.
+        deadline: optional request_deadline.Deadline, checked before each chunk and during generation.
         """
         if not text.strip():
             return ""
@@ -121,16 +138,60 @@ class Translator:
         self.tokenizer.src_lang = source_lang
         outs: List[str] = []
         for chunk in self._split_into_chunks(text, max_chars=900):
+            stop_kwargs = self._stop_kwargs(deadline)
             enc = self.tokenizer(chunk, return_tensors="pt")
             gen = self.model.generate(
                 **enc,
                 forced_bos_token_id=self.tokenizer.get_lang_id(target_lang),
                 max_length=512,
+                **stop_kwargs,
             )
+            if deadline is not None:
+                deadline.check()  # a stopped generate() returns truncated text; drop it
             out = self.tokenizer.batch_decode(gen, skip_special_tokens=True)[0]
             outs.append(out)
         return " ".join(outs).strip()
 
+    def translate_many(self, text: str, source_lang: str, target_langs: List[str],
+                       deadline=None) -> Dict[str, str]:
+        """
+        Translate text into several target languages at once. Each chunk is tokenized and run
+        through the encoder once; the cached encoder outputs are then expanded across targets and
+        decoded in a single batched generate call, one row per target (only the forced BOS differs).
+        """
+        targets = list(dict.fromkeys(target_langs))
+        if not text.strip() or not targets:
+            return {t: "" for t in targets}
+
+        import torch
+
+        self.tokenizer.src_lang = source_lang
+        n = len(targets)
+        lang_ids = torch.tensor([[self.tokenizer.get_lang_id(t)] for t in targets])
+        start = torch.full((n, 1), self.model.config.decoder_start_token_id, dtype=torch.long)
+        outs: Dict[str, List[str]] = {t: [] for t in targets}
+        for chunk in self._split_into_chunks(text, max_chars=900):
+            stop_kwargs = self._stop_kwargs(deadline)
+            enc = self.tokenizer(chunk, return_tensors="pt")
+            with torch.no_grad():
+                encoder_outputs = self.model.get_encoder()(**enc)
+            # Share the single encoder pass across all targets (expand is a view, not a copy).
+            hidden = encoder_outputs.last_hidden_state.expand(n, -1, -1)
+            encoder_outputs.last_hidden_state = hidden
+            gen = self.model.generate(
+                encoder_outputs=encoder_outputs,
+                attention_mask=enc["attention_mask"].expand(n, -1),
+                # Equivalent to forced_bos_token_id, but per row: [decoder_start, <target lang>].
+                decoder_input_ids=torch.cat([start, lang_ids], dim=1),
+                max_length=512,
+                **stop_kwargs,
+            )
+            if deadline is not None:
+                deadline.check()
+            for t, out in zip(targets, self.tokenizer.batch_decode(gen, skip_special_tokens=True)):
+                outs[t].append(out)
+        return {t: " ".join(parts).strip() for t, parts in outs.items()}
+
 
 # --------------------------
 # Demo input (dummy data)
@@ -185,35 +246,72 @@ def run_cli():
 # --------------------------
 # API mode (for frontend)
 # --------------------------
-def run_api(host: str, port: int):
+def run_api(host: str, port: int, models=None, request_timeout_ms: float = 0.0):
     """
     Start a simple FastAPI server exposing /translate.
     POST /translate
     {
       "text": "string",
       "source_lang": "en",
-      "target_lang": "hi"
+      "target_lang": "hi",
+      "deadline_ms": 10000        (optional; or header X-Deadline-Ms)
     }
+    Requests past their deadline (504) or whose client disconnected (499) stop translating.
     """
     if not FASTAPI_AVAILABLE:
         print("[!] fastapi/uvicorn not installed. Run:\n    pip install fastapi uvicorn pydantic\n")
         sys.exit(1)
 
-    tr = Translator(MODEL_ID)
+    from model_lifecycle import ModelManager
+    from request_deadline import (RequestCancelled, RequestStats, STATUS_CANCELLED, STATUS_TIMEOUT,
+                                  deadline_from, run_cancellable)
+
+    # M2M100 is loaded through the lifecycle manager so it can be unloaded when idle/over budget.
+    models = models or ModelManager()
+    models.register("translator", lambda: Translator(MODEL_ID))
+    models.get("translator")  # warm start
+    stats = RequestStats()
+
+    async def run_translation(request: Request, deadline, method: str, *args, **kwargs):
+        def work():
+            with models.use("translator") as tr:
+                return getattr(tr, method)(*args, deadline=deadline, **kwargs)
+
+        try:
+            out = await run_cancellable(request, deadline, work)
+        except RequestCancelled as e:
+            stats.record(e.reason)
+            print(f"[i] {request.url.path} stopped: {e}", flush=True)
+            status = STATUS_TIMEOUT if e.reason == "timed_out" else STATUS_CANCELLED
+            return None, JSONResponse(status_code=status, content={"detail": str(e)})
+        stats.record("completed")
+        return out, None
     app = FastAPI(title="Mythology Translator API", version="1.0.0")
 
     class TranslateIn(BaseModel):
         text: str
         source_lang: str = DEFAULT_SOURCE_LANG
         target_lang: str
+        deadline_ms: Optional[float] = None
 
     class TranslateOut(BaseModel):
         translation: str
         source_lang: str
         target_lang: str
 
+    class TranslateManyIn(BaseModel):
+        text: str
+        source_lang: str = DEFAULT_SOURCE_LANG
+        target_langs: List[str] = []  # empty -> all LANG_OPTIONS
+        deadline_ms: Optional[float] = None
+
+    class TranslateManyOut(BaseModel):
+        translations: Dict[str, str]
+        source_lang: str
+
     @app.post("/translate", response_model=TranslateOut)
-    def translate_endpoint(payload: TranslateIn):
+    async def translate_endpoint(payload: TranslateIn, request: Request,
+                                 x_deadline_ms: Optional[str] = Header(None)):
         # Basic sanity check for allowed langs; in production you might relax or expand this.
         if payload.source_lang not in (["en"] + list(LANG_OPTIONS.values())):
             return TranslateOut(
@@ -227,25 +325,90 @@ def run_api(host: str, port: int):
                 source_lang=payload.source_lang,
                 target_lang=payload.target_lang,
             )
-        out = tr.translate(payload.text, source_lang=payload.source_lang, target_lang=payload.target_lang)
+        deadline = deadline_from(x_deadline_ms, payload.deadline_ms, request_timeout_ms)
+        out, stopped = await run_translation(request, deadline, "translate", payload.text,
+                                             source_lang=payload.source_lang, target_lang=payload.target_lang)
+        if stopped is not None:
+            return stopped
         return TranslateOut(translation=out, source_lang=payload.source_lang, target_lang=payload.target_lang)
 
-    print(f"[i] API running at http://{host}:{port}  (POST /translate)")
+    @app.post("/translate/many", response_model=TranslateManyOut)
+    async def translate_many_endpoint(payload: TranslateManyIn, request: Request,
+                                      x_deadline_ms: Optional[str] = Header(None)):
+        if payload.source_lang not in (["en"] + list(LANG_OPTIONS.values())):
+            return TranslateManyOut(translations={}, source_lang=payload.source_lang)
+        targets = [t for t in (payload.target_langs or LANG_OPTIONS.values()) if t in LANG_OPTIONS.values()]
+        deadline = deadline_from(x_deadline_ms, payload.deadline_ms, request_timeout_ms)
+        outs, stopped = await run_translation(request, deadline, "translate_many", payload.text,
+                                              source_lang=payload.source_lang, target_langs=targets)
+        if stopped is not None:
+            return stopped
+        return TranslateManyOut(translations=outs, source_lang=payload.source_lang)
+
+    @app.get("/metrics")
+    def metrics():
+        return {"models": models.metrics(), "requests": stats.snapshot()}
+
+    print(f"[i] API running at http://{host}:{port}  (POST /translate, POST /translate/many, GET /metrics)")
     uvicorn.run(app, host=host, port=port)
 
 
+# --------------------------
+# Batch mode (offline corpus)
+# --------------------------
+def _batch_init(opts: dict) -> Translator:
+    return Translator(opts["model_id"])
+
+
+def _batch_work(tr: Translator, text: str, opts: dict) -> Dict[str, str]:
+    targets = opts["target_langs"]
+    if len(targets) == 1:
+        return {targets[0]: tr.translate(text, source_lang=opts["source_lang"], target_lang=targets[0])}
+    return tr.translate_many(text, source_lang=opts["source_lang"], target_langs=targets)
+
+
+def run_batch_cli(args) -> None:
+    from batch_cli import run_batch
+
+    targets = [t.strip() for t in args.target_langs.split(",") if t.strip()] or list(LANG_OPTIONS.values())
+    bad = [t for t in targets if t not in LANG_OPTIONS.values()]
+    if bad:
+        print(f"[!] Unsupported target language(s): {', '.join(bad)}", file=sys.stderr)
+        sys.exit(1)
+    opts = {"model_id": MODEL_ID, "source_lang": args.source_lang, "target_langs": targets,
+            "torch_threads": args.torch_threads}
+    failed = run_batch(args.batch, _batch_init, _batch_work, opts,
+                       workers=args.workers, sink=args.sink, suffix=args.suffix)
+    sys.exit(1 if failed else 0)
+
+
 # --------------------------
 # Entrypoint
 # --------------------------
 def main():
+    from batch_cli import add_batch_args
+    from model_lifecycle import add_lifecycle_args, manager_from_args
+    from request_deadline import add_deadline_args
+
     parser = argparse.ArgumentParser(description="Local multilingual translator (M2M100).")
     parser.add_argument("--serve", action="store_true", help="Run as an HTTP API instead of CLI demo")
     parser.add_argument("--host", type=str, default="127.0.0.1", help="Host for API mode")
     parser.add_argument("--port", type=int, default=8000, help="Port for API mode")
+    parser.add_argument("--source-lang", type=str, default=DEFAULT_SOURCE_LANG, help="Source language for --batch")
+    parser.add_argument("--target-langs", type=str, default="", help="Comma-separated target languages for --batch (default: all)")
+    parser.add_argument("--offline", action="store_true", help="Only load preloaded models (see model_store.py); never download")
+    add_batch_args(parser, default_suffix="translation")
+    add_lifecycle_args(parser)
+    add_deadline_args(parser)
     args = parser.parse_args()
-
-    if args.serve:
-        run_api(args.host, args.port)
+    if args.offline:
+        from model_store import set_offline
+        set_offline(True)
+
+    if args.batch:
+        run_batch_cli(args)
+    elif args.serve:
+        run_api(args.host, args.port, models=manager_from_args(args), request_timeout_ms=args.request_timeout_ms)
     else:
         run_cli()
 
@@ -115,9 +115,13 @@ export class AiPanelComponent implements OnInit {
     this.userQuestion = '';
 
     // Call chatbot API
+    // Send the open verse so the chatbot searches its chapter/book first
     this.http.post(`${this.CHATBOT_API_URL}/ask`, {
       question: question,
-      target_lang: 'en'
+      target_lang: 'en',
+      Book_id: this.selectedVerse?.Book_id ?? null,
+      Chapter_id: this.selectedVerse?.Chapter_id ?? null,
+      Verse_id: this.selectedVerse?.Verse_id ?? null
     }).subscribe({
       next: (response: any) => {
         const botMessage: ChatMessage = {